@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+"""
+Benchmark of image loading and blitting, comparing per-mole unconverted images against the Assets cache.
+Run from the repository root: python benchmarks/assets.py
+"""
+
+from os import environ, path
+from sys import path as sys_path
+from time import perf_counter
+
+environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys_path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from pygame import init, quit, display, image, transform
+from whackamole.assets import Assets
+from whackamole.constants import Constants
+
+# Mole counts to try, as if MOLECOUNT was raised
+MOLECOUNTS = [1, 9, 100]
+
+MOLESIZE = (Constants.MOLEWIDTH, Constants.MOLEHEIGHT)
+
+
+def load_uncached(count):
+    """
+    Loads images the way each Mole and Game did before the cache
+    """
+
+    background = transform.scale(image.load(Constants.IMAGEBACKGROUND), (Constants.GAMEWIDTH, Constants.GAMEHEIGHT))
+    hole = transform.scale(image.load(Constants.IMAGEHOLE), (Constants.HOLEWIDTH, Constants.HOLEHEIGHT))
+    moles = [transform.scale(image.load(Constants.IMAGEMOLENORMAL), MOLESIZE) for _ in range(count)]
+    for _ in range(count):
+        transform.scale(image.load(Constants.IMAGEMOLEHIT), MOLESIZE)
+    return background, hole, moles
+
+
+def load_cached(count):
+    Assets.images.clear()
+    assets = Assets()
+    background = assets.image(Constants.IMAGEBACKGROUND, (Constants.GAMEWIDTH, Constants.GAMEHEIGHT), alpha=False)
+    hole = assets.image(Constants.IMAGEHOLE, (Constants.HOLEWIDTH, Constants.HOLEHEIGHT))
+    moles = [assets.image(Constants.IMAGEMOLENORMAL, MOLESIZE) for _ in range(count)]
+    for _ in range(count):
+        assets.image(Constants.IMAGEMOLEHIT, MOLESIZE)
+    return background, hole, moles
+
+
+def frame_ms(screen, background, hole, moles, frames=200):
+    """
+    Average time to blit a frame of board and moles
+    """
+
+    positions = [(x * 50 % Constants.GAMEWIDTH, x * 30 % Constants.GAMEHEIGHT) for x in range(len(moles))]
+    start = perf_counter()
+    for _ in range(frames):
+        screen.blit(background, (0, 0))
+        for x in range(Constants.HOLEROWS * Constants.HOLECOLUMNS):
+            screen.blit(hole, (x * 50, x * 50))
+        for mole, position in zip(moles, positions):
+            screen.blit(mole, position)
+    return (perf_counter() - start) / frames * 1000
+
+
+def main():
+    init()
+    screen = display.set_mode((Constants.GAMEWIDTH, Constants.GAMEHEIGHT))
+
+    print("{:>6} {:>14} {:>14} {:>14} {:>14}".format("Moles", "Load before", "Load after", "Frame before",
+                                                     "Frame after"))
+    for count in MOLECOUNTS:
+        start = perf_counter()
+        before = load_uncached(count)
+        load_before = (perf_counter() - start) * 1000
+
+        start = perf_counter()
+        after = load_cached(count)
+        load_after = (perf_counter() - start) * 1000
+
+        print("{:>6} {:>12.1f}ms {:>12.1f}ms {:>12.2f}ms {:>12.2f}ms".format(
+            count, load_before, load_after, frame_ms(screen, *before), frame_ms(screen, *after)))
+
+    quit()
+
+
+if __name__ == "__main__":
+    main()
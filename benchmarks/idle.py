@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+"""
+Benchmark of CPU use on the title, playing and game over screens, with and without waiting when idle.
+Sits on each screen for SECONDS, whacking a key every 200ms while playing.
+Run from the repository root: python benchmarks/idle.py
+"""
+
+from os import environ, path
+from sys import path as sys_path
+from threading import Thread
+from time import perf_counter, sleep
+
+environ.setdefault("SDL_VIDEODRIVER", "dummy")
+environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys_path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from pygame import event, KEYDOWN, QUIT, K_s
+from whackamole.constants import Constants
+from whackamole.game import Game
+
+Constants.BOARDBACKEND = "none"
+
+SECONDS = 3
+
+
+def player(events):
+    """
+    Posts :events:, a list of (seconds from now, event), on time from another thread as a player would
+    """
+
+    start = perf_counter()
+    for at, e in events:
+        sleep(max(at - (perf_counter() - start), 0))
+        event.post(e)
+
+
+def usage(idle):
+    Constants.GAMEIDLE = idle
+    game = Game(timer=SECONDS, autostart=False, seed=0)
+
+    # Title, then the first key starts the game, which ends itself, then game over
+    press = event.Event(KEYDOWN, key=K_s)
+    events = [(SECONDS, press)] + [(SECONDS + f / 1000, press) for f in range(200, SECONDS * 1000, 200)]
+    events.append((SECONDS * 3, event.Event(QUIT)))
+
+    Thread(target=player, args=(events,), daemon=True).start()
+    game.start()
+    return game.cpu_usage
+
+
+def main():
+    print("{:>10} {:>10} {:>10} {:>10}".format("Idle wait", "Title", "Playing", "Game over"))
+    for idle in (False, True):
+        cpu = usage(idle)
+        print("{:>10} {:>9.1%} {:>9.1%} {:>9.1%}".format("on" if idle else "off", cpu.get("title", 0),
+                                                         cpu.get("playing", 0), cpu.get("gameover", 0)))
+
+
+if __name__ == "__main__":
+    main()
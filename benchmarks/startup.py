@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+"""
+Benchmark of startup, time to the first frame and to the first playable frame.
+Each start is a fresh process, without the image cache, with it empty and with it filled.
+Run from the repository root: python benchmarks/startup.py
+"""
+
+from os import environ, path
+from shutil import rmtree
+from subprocess import run
+from sys import argv, executable, path as sys_path
+from tempfile import mkdtemp
+
+environ.setdefault("SDL_VIDEODRIVER", "dummy")
+environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys_path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+STARTS = 5
+
+
+def start(cache):
+    """
+    Starts a game, quitting after the first playable frame, and prints its startup times
+    """
+
+    from pygame import event, QUIT
+    from whackamole.constants import Constants
+    from whackamole.game import Game
+
+    Constants.BOARDBACKEND = "none"
+    Constants.IMAGECACHE = cache or None
+    game = Game(timer=60, autostart=False)
+    event.post(event.Event(QUIT))
+    game.start()
+    print(game.startup["first_frame"], game.startup["interactive"])
+
+
+def starts(cache, empty=False):
+    """
+    Times :STARTS: fresh processes, emptying the :cache: directory before each if :empty:
+    Returns tuple of median ms to first frame and to interactive
+    """
+
+    times = []
+    for _ in range(STARTS):
+        if empty:
+            rmtree(cache, ignore_errors=True)
+        result = run([executable, __file__, "start", cache], capture_output=True, text=True, check=True)
+        times.append([float(f) for f in result.stdout.split()[-2:]])
+    first = sorted(f[0] for f in times)[STARTS // 2]
+    interactive = sorted(f[1] for f in times)[STARTS // 2]
+    return (first, interactive)
+
+
+def main():
+    cache = mkdtemp()
+    print("{:<14} {:>12} {:>12}".format("Image cache", "First frame", "Interactive"))
+    try:
+        print("{:<14} {:>10.1f}ms {:>10.1f}ms".format("off", *starts("")))
+        print("{:<14} {:>10.1f}ms {:>10.1f}ms".format("empty", *starts(cache, empty=True)))
+        print("{:<14} {:>10.1f}ms {:>10.1f}ms".format("filled", *starts(cache)))
+    finally:
+        rmtree(cache, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    if len(argv) > 2 and argv[1] == "start":
+        start(argv[2])
+    else:
+        main()
@@ -0,0 +1,397 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+"""
+Suite of the hot paths, saved as JSON so runs can be compared for regressions.
+Every result is a time where lower is better, the median of REPEATS runs.
+Run from the repository root:
+
+    python benchmarks/suite.py run [--out results.json] [--only text]
+    python benchmarks/suite.py compare baseline.json results.json [--threshold 10]
+
+Store a baseline by running with --out benchmarks/baseline.json, compare exits 1 if anything regressed.
+"""
+
+import argparse
+import platform
+from datetime import datetime
+from json import dump, load
+from math import ceil, sqrt
+from os import close, environ, path, remove
+from sys import exit, path as sys_path
+from tempfile import mkstemp
+from time import perf_counter, sleep
+
+environ.setdefault("SDL_VIDEODRIVER", "dummy")
+environ.setdefault("SDL_AUDIODRIVER", "dummy")
+environ.setdefault("GPIOZERO_PIN_FACTORY", "mock")
+sys_path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+import pygame
+from pygame import event, KEYDOWN, K_q, K_w, K_e, K_a, K_s, K_d, K_z, K_x, K_c
+from whackamole.constants import Constants
+from whackamole.assets import Assets
+from whackamole.capture import Capture
+from whackamole.game import Game
+from whackamole.holes import HoleIndex
+from whackamole.lightMatrix import LightMatrix, NullBackend
+from whackamole.mole import Mole
+from whackamole.text import Text
+from whackamole.score import Score
+from whackamole.simulation import Simulation
+from whackamole.telemetry import Telemetry
+
+from text import LABELS, AtlasText
+from vectorized import MoleObjects, MoleArray, step_ms
+
+# Games are made over and over, which can't each claim the GPIO pins
+Constants.BOARDBACKEND = "none"
+
+REPEATS = 5
+
+# Mole counts for the drawing and stepping benchmarks, holes are added to fit
+MOLECOUNTS = [1, 9, 100]
+
+KEYS = [K_q, K_w, K_e, K_a, K_s, K_d, K_z, K_x, K_c]
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def timed(function, count, repeats=REPEATS):
+    """
+    Runs :function: :count: times, :repeats: times over
+    Returns float of the median us per call
+    """
+
+    results = []
+    for _ in range(repeats):
+        start = perf_counter()
+        for _ in range(count):
+            function()
+        results.append((perf_counter() - start) / count * 1000000)
+    return median(results)
+
+
+class Board:
+    """
+    Sets the board up to fit :moles:, with a screen big enough that the holes don't overlap,
+    putting the constants back after
+    """
+
+    def __init__(self, moles):
+        self.moles = moles
+        self.saved = (Constants.MOLECOUNT, Constants.HOLEROWS, Constants.HOLECOLUMNS,
+                      Constants.GAMEWIDTH, Constants.GAMEHEIGHT)
+
+    def __enter__(self):
+        side = max(ceil(sqrt(self.moles)), 3)
+        Constants.MOLECOUNT, Constants.HOLEROWS, Constants.HOLECOLUMNS = self.moles, side, side
+        Constants.GAMEWIDTH = max(Constants.GAMEWIDTH, side * (Constants.HOLEWIDTH + 10))
+        Constants.GAMEHEIGHT = max(Constants.GAMEHEIGHT, side * (Constants.HOLEWIDTH + 10))
+
+    def __exit__(self, *args):
+        (Constants.MOLECOUNT, Constants.HOLEROWS, Constants.HOLECOLUMNS,
+         Constants.GAMEWIDTH, Constants.GAMEHEIGHT) = self.saved
+
+
+def lights():
+    # A light for every hole on the board
+    return LightMatrix(list(range(Constants.HOLEROWS * Constants.HOLECOLUMNS)), NullBackend())
+
+
+def game():
+    g = Game(timer=60, autostart=False, seed=0)
+    g.loader.sounds_ready.wait()
+    g.light_matrix = lights()
+    g.reset()
+    return g
+
+
+def clear_caches():
+    Assets.decoded.clear()
+    Assets.images.clear()
+    Assets.animations.clear()
+    Mole.images = None
+    Text.fonts.clear()
+    Text.atlases.clear()
+
+
+def bench_text(results):
+    """
+    Text.get_label from the cache and built each time
+    """
+
+    cached = Text()
+    results["text.get_label_cached_us"] = timed(
+        lambda: [cached.get_label(f, b, **k) for f, b, k in LABELS], 2000) / len(LABELS)
+    atlas = AtlasText()
+    results["text.get_label_uncached_us"] = timed(
+        lambda: [atlas.get_label(f, b, **k) for f, b, k in LABELS], 100) / len(LABELS)
+
+
+def bench_score(results):
+    """
+    Score.label as the timer counts down, a new label each second
+    """
+
+    score = Score(Text())
+    timer = [60.0]
+
+    def label():
+        timer[0] = timer[0] - Constants.GAMESTEP / 1000 if timer[0] > 0 else 60.0
+        score.label(timer=timer[0])
+
+    results["score.label_us"] = timed(label, 2000)
+
+
+def bench_display(results):
+    """
+    Game.loop_display, with the moles popping up as they do in a game, and on the title screen
+    """
+
+    for count in MOLECOUNTS:
+        with Board(count):
+            g = game()
+            g.press(-1)
+
+            def frame():
+                g.update(Constants.GAMESTEP)
+                g.loop_display(g.snapshot())
+
+            for _ in range(120):
+                frame()
+            results["game.loop_display_{}_us".format(count)] = timed(frame, 200)
+
+    # The faded title screen, with the moles still moving under it
+    g = game()
+    g.renderer.dirty = True
+
+    def title():
+        g.update(Constants.GAMESTEP)
+        g.loop_display(g.snapshot())
+
+    for _ in range(120):
+        title()
+    results["game.loop_display_title_us"] = timed(title, 200)
+
+
+def bench_moles(results):
+    """
+    Mole stepping through Simulation.update and its Scheduler, and Mole.get_hole_pos on the shown moles
+    """
+
+    for count in MOLECOUNTS:
+        with Board(count):
+            simulation = Simulation(timer=None, light_matrix=lights(), seed=0)
+            for _ in range(120):
+                simulation.update(Constants.GAMESTEP)
+            results["mole.update_{}_us".format(count)] = timed(lambda: simulation.update(Constants.GAMESTEP), 2000)
+
+            shown = [f for f in simulation.moles if f.visible] or simulation.moles
+            results["mole.get_hole_pos_{}_us".format(count)] = timed(
+                lambda: [f.get_hole_pos(0.5) for f in shown], 2000) / len(shown)
+
+    results["vectorized.objects_step_10000_us"] = median(
+        [step_ms(MoleObjects(3333, 10000, 0), 10) for _ in range(REPEATS)]) * 1000
+    results["vectorized.numpy_step_10000_us"] = median(
+        [step_ms(MoleArray(3333, 10000, 0), 10) for _ in range(REPEATS)]) * 1000
+
+
+def bench_assets(results):
+    """
+    Game.__init__ from cold caches, which is all the asset loading, and the sounds loading after
+    """
+
+    def load():
+        clear_caches()
+        game()
+
+    results["game.init_ms"] = timed(load, 1) / 1000
+
+
+def bench_input(results):
+    """
+    A keypress from pygame's queue through loop_events and loop_presses to the score, and pointer hit tests
+    """
+
+    g = game()
+    g.press(-1)
+    for _ in range(120):
+        g.update(Constants.GAMESTEP)
+    key = [0]
+
+    def press():
+        # Whack a shown mole if there is one so hits are timed as well as misses
+        shown = [f.position for f in g.moles if f.visible]
+        pos = shown[0] if shown else key[0] % len(KEYS)
+        key[0] += 1
+        event.post(event.Event(KEYDOWN, key=KEYS[pos]))
+        g.loop_events()
+        g.loop_presses(float("inf"))
+        g.update(Constants.GAMESTEP)
+
+    results["game.keypress_to_score_us"] = timed(press, 500)
+
+    # Pointer hit tests on boards of holes side by side, which should cost the same however many there are
+    for side in (3, 30, 300):
+        positions = [(column * 100, row * 100) for row in range(side) for column in range(side)]
+        index = HoleIndex(positions, (0, -40, 100, 80), (side * 100, side * 100))
+        points = [((f * 7919) % (side * 100), (f * 104729) % (side * 100)) for f in range(1000)]
+        results["holes.hole_at_{}_us".format(side * side)] = timed(
+            lambda: [index.hole_at(x, y) for x, y in points], 20) / len(points)
+
+
+def bench_telemetry(results):
+    """
+    Telemetry.record into the ring buffer
+    """
+
+    handle, file = mkstemp()
+    close(handle)
+    # Sized to hold every record, so none take the cheap drop when full
+    count = 20000
+    telemetry = Telemetry(file, size=count * REPEATS)
+    results["telemetry.record_us"] = timed(lambda: telemetry.record(Telemetry.FRAME, 0, 16.7, 1), count)
+    telemetry.close()
+    remove(file)
+
+
+def bench_capture(results):
+    """
+    Capture.frame, the copy the game loop pays for each captured frame, against saving a PNG in the loop
+    """
+
+    screen = pygame.display.get_surface()
+    screen.fill((80, 120, 40))
+
+    # Nothing to encode to, so only the copy and hand over are timed, with a buffer free for every frame
+    count = 50
+    capture = Capture(screen, buffers=count)
+    times = []
+    for _ in range(REPEATS):
+        start = perf_counter()
+        for _ in range(count):
+            capture.frame(screen)
+        times.append((perf_counter() - start) / count * 1000000)
+        while capture.encoded < capture.frames:
+            sleep(0.001)
+    capture.close()
+    results["capture.frame_us"] = median(times)
+
+    handle, file = mkstemp(suffix=".png")
+    close(handle)
+    results["capture.save_png_us"] = timed(lambda: pygame.image.save(screen, file), 10)
+    remove(file)
+
+
+BENCHMARKS = {
+    "text": bench_text,
+    "score": bench_score,
+    "display": bench_display,
+    "moles": bench_moles,
+    "assets": bench_assets,
+    "input": bench_input,
+    "telemetry": bench_telemetry,
+    "capture": bench_capture,
+}
+
+
+def run(only=None):
+    """
+    Runs the benchmarks, or just the :only: ones
+    Returns dict of meta data and results
+    """
+
+    pygame.init()
+    pygame.display.set_mode((Constants.GAMEWIDTH, Constants.GAMEHEIGHT))
+
+    results = {}
+    for name, bench in BENCHMARKS.items():
+        if only and name not in only:
+            continue
+        start = perf_counter()
+        bench(results)
+        print("{} done in {:.1f}s".format(name, perf_counter() - start))
+
+    pygame.quit()
+
+    meta = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "machine": platform.platform(),
+        "repeats": REPEATS,
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(baseline, current, threshold):
+    """
+    Prints each result against the baseline, flagging any more than :threshold: % slower
+    Returns bool of if anything regressed
+    """
+
+    regressed = False
+    print("{:<36} {:>12} {:>12} {:>8}".format("Benchmark", "Baseline", "Current", "Change"))
+    for name in sorted(set(baseline["results"]) | set(current["results"])):
+        before = baseline["results"].get(name)
+        after = current["results"].get(name)
+        if before is None or after is None:
+            print("{:<36} {:>12} {:>12}".format(name, "-" if before is None else "{:.3f}".format(before),
+                                                "-" if after is None else "{:.3f}".format(after)))
+            continue
+
+        change = (after - before) / before * 100 if before else 0
+        flag = ""
+        if change > threshold:
+            flag = "REGRESSION"
+            regressed = True
+        elif change < -threshold:
+            flag = "faster"
+        print("{:<36} {:>12.3f} {:>12.3f} {:>+7.1f}% {}".format(name, before, after, change, flag))
+
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game's hot paths")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the suite")
+    run_parser.add_argument("--out", default=None, help="file to save the results to")
+    run_parser.add_argument("--only", nargs="*", choices=list(BENCHMARKS), help="benchmarks to run")
+
+    compare_parser = commands.add_parser("compare", help="compare results against a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=10, help="% slower counted as a regression")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        data = run(args.only)
+        for name, value in sorted(data["results"].items()):
+            print("{:<36} {:>12.3f}".format(name, value))
+        if args.out:
+            with open(args.out, "w") as f:
+                dump(data, f, indent=2)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = load(f)
+    with open(args.current) as f:
+        current = load(f)
+    return 1 if compare(baseline, current, args.threshold) else 0
+
+
+if __name__ == "__main__":
+    exit(main())
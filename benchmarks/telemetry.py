@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+"""
+Benchmark of telemetry recording overhead, per event and on a headless game with a frame event each step.
+Headless games run far faster than real time than the writer drains, so the buffers are sized to hold every event,
+otherwise most records would take the cheap drop when full and the overhead would look smaller than it is.
+Run from the repository root: python benchmarks/telemetry.py
+"""
+
+import random
+from os import close, path, remove
+from sys import path as sys_path
+from tempfile import mkstemp
+from time import perf_counter
+
+sys_path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from whackamole.constants import Constants
+from whackamole.simulation import Simulation
+from whackamole.telemetry import Telemetry
+
+EVENTS = 200000
+GAMES = 20
+
+# Steps in each game, the frame each step plus the presses, spawns and resets fit in twice this
+STEPS = int(60 * 1000 / Constants.GAMESTEP) + 1
+
+
+def play(telemetry):
+    """
+    Plays headless games, pressing a random hole every 100ms
+    Returns float of ms per step
+    """
+
+    random.seed(0)
+    steps = 0
+    start = perf_counter()
+    for _ in range(GAMES):
+        simulation = Simulation(timer=60, telemetry=telemetry)
+        simulation.press(-1)
+        while not simulation.timerData[1]:
+            simulation.update(Constants.GAMESTEP)
+            steps += 1
+            if telemetry:
+                telemetry.record(Telemetry.FRAME, simulation.ticks, Constants.GAMESTEP, 1)
+            if steps % 6 == 0:
+                simulation.press(random.randrange(Constants.HOLEROWS * Constants.HOLECOLUMNS))
+    return (perf_counter() - start) / steps * 1000
+
+
+def main():
+    for binary in (False, True):
+        handle, file = mkstemp()
+        close(handle)
+
+        telemetry = Telemetry(file, binary=binary, size=EVENTS)
+        start = perf_counter()
+        for index in range(EVENTS):
+            telemetry.record(Telemetry.FRAME, index, 16.7, 1)
+        elapsed = perf_counter() - start
+        stored = EVENTS - telemetry.dropped
+        per_event = elapsed / stored * 1000000 if stored else 0
+        telemetry.close()
+
+        without = play(None)
+        telemetry = Telemetry(file, binary=binary, size=GAMES * STEPS * 2)
+        recording = play(telemetry)
+        telemetry.close()
+
+        print("{}: {:.2f}us per event stored, {:.4f}ms per step without / {:.4f}ms with, {:,} dropped, "
+              "{:,} bytes".format("Binary" if binary else "JSONL", per_event, without, recording,
+                                  EVENTS - stored + telemetry.dropped, path.getsize(file)))
+        remove(file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+"""
+Micro-benchmark of label rendering, comparing labels/sec of the uncached text path against Text.
+Run from the repository root: python benchmarks/text.py
+"""
+
+from os import environ, path
+from sys import path as sys_path
+from time import perf_counter
+
+environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys_path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from pygame import init, quit, display, font
+from whackamole.constants import Constants
+from whackamole.text import Text
+
+# The labels drawn each frame by Game.loop_display
+LABELS = [
+    ("Score: 12 / Hits: 8 (66.7%) / Misses: 4 (33.3%) / Level: 2 / Time Remaining: 42s", "/",
+     {"width": Constants.GAMEWIDTH, "background": (0, 0, 0, 0.4 * 255)}),
+    ("Hit!", "", {"scale": 3, "color": (255, 50, 0)}),
+    ("Miss!", "", {"scale": 2, "color": (0, 150, 255)}),
+    ("Time's up!", "", {"scale": 3, "color": (0, 150, 255)}),
+    ("Press space to restart...", "", {"scale": 2, "color": (0, 150, 255)}),
+]
+
+
+class UncachedText(Text):
+    """
+    The text path before caching, loading the font and rendering whole strings for every label
+    """
+
+    def font(self, size):
+        f = font.Font(Constants.TEXTFONTFILE, int(size))
+        test = f.render("a", 1, (0, 0, 0))
+        return (f, test.get_width())
+
+    def render(self, line, size, color):
+        f, _ = self.font(size)
+        return f.render(line, 1, color)
+
+    def get_label(self, string, break_char="", **kwargs):
+        return self.build_label(string, break_char, **kwargs)
+
+
+class AtlasText(Text):
+    """
+    The glyph atlas path, without the label cache
+    """
+
+    def get_label(self, string, break_char="", **kwargs):
+        return self.build_label(string, break_char, **kwargs)
+
+
+def labels_per_second(text, seconds):
+    count = 0
+    start = perf_counter()
+    while perf_counter() - start < seconds:
+        for string, break_char, kwargs in LABELS:
+            text.get_label(string, break_char, **kwargs)
+        count += len(LABELS)
+    return count / (perf_counter() - start)
+
+
+def main(seconds=2.0):
+    init()
+    display.set_mode((Constants.GAMEWIDTH, Constants.GAMEHEIGHT))
+
+    before = labels_per_second(UncachedText(), seconds)
+    atlas = labels_per_second(AtlasText(), seconds)
+    after = labels_per_second(Text(), seconds)
+
+    print("Uncached:    {:,.0f} labels/sec".format(before))
+    print("Glyph atlas: {:,.0f} labels/sec ({:,.1f}x)".format(atlas, atlas / before))
+    print("Label cache: {:,.0f} labels/sec ({:,.1f}x)".format(after, after / before))
+
+    quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+"""
+Stress test of input latency under render load, with the simulation on the main thread and on its own.
+Each frame is held up by LOADS ms, as a slow display would, while a button is pressed every 97ms.
+Latency is from the press to it being judged, which includes up to a step as presses are judged on their step.
+Run from the repository root: python benchmarks/threaded.py
+"""
+
+from os import environ, path
+from sys import path as sys_path
+from threading import Thread
+from time import perf_counter, sleep
+
+environ.setdefault("SDL_VIDEODRIVER", "dummy")
+environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys_path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from pygame import event, QUIT
+from whackamole.constants import Constants
+from whackamole.bot import time_presses
+from whackamole.game import Game
+from whackamole.simulation import percentile
+
+Constants.BOARDBACKEND = "none"
+
+SECONDS = 3
+
+# ms each frame is held up for
+LOADS = [0, 20, 50, 100]
+
+
+def player(game):
+    """
+    Presses the buttons in turn every 97ms, off the frame rate, then closes the window
+    """
+
+    start = perf_counter()
+    presses = 0
+    while perf_counter() - start < SECONDS:
+        game.buttons.press(presses % 9)
+        presses += 1
+        sleep(0.097)
+    event.post(event.Event(QUIT))
+
+
+def latencies(threaded, load):
+    """
+    Plays for SECONDS with each frame taking at least :load: ms
+    Returns list of ms from each press to it being judged
+    """
+
+    Constants.GAMETHREADED = threaded
+    game = Game(autostart=False, seed=0)
+    results = []
+
+    display = game.loop_display
+
+    def loop_display(*args, **kwargs):
+        display(*args, **kwargs)
+        sleep(load / 1000)
+
+    game.loop_display = loop_display
+    time_presses(game, results)
+
+    Thread(target=player, args=(game,), daemon=True).start()
+    game.start()
+    return results
+
+
+def main():
+    print("{:>10} {:>10} {:>10} {:>10} {:>10}".format("Threaded", "Load ms", "Presses", "p50 ms", "p99 ms"))
+    for threaded in (False, True):
+        for load in LOADS:
+            values = latencies(threaded, load)
+            print("{:>10} {:>10} {:>10} {:>10.1f} {:>10.1f}".format("on" if threaded else "off", load, len(values),
+                                                                    percentile(values, 50), percentile(values, 99)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+"""
+Compares the NumPy MoleArray engine against Mole objects, first checking seeded runs of both
+play out the same on average, then timing a step at 9, 100 and 10,000 holes.
+Run from the repository root: python benchmarks/vectorized.py
+"""
+
+import random
+from os import path
+from sys import path as sys_path
+from time import perf_counter
+
+sys_path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from whackamole.constants import Constants
+from whackamole.holes import HoleGrid
+from whackamole.lightMatrix import LightMatrix, NullBackend
+from whackamole.mole import Mole
+from whackamole.scheduler import Scheduler
+from whackamole.vectorized import MoleArray
+
+# (moles, holes) to compare
+COMPARE = [(1, 9), (3, 9), (30, 100)]
+COMPARESEEDS = 30
+COMPARETOLERANCE = 0.05
+
+# Holes to time, with a mole for every third hole
+HOLES = [9, 100, 10000]
+
+LEVEL = 3
+
+
+class MoleObjects:
+    """
+    Mole objects over a HoleGrid, stepped by a Scheduler the way Simulation.update does
+    """
+
+    def __init__(self, moles, holes, seed=None):
+        rng = random.Random(seed)
+        self.grid = HoleGrid([(0, 0)] * holes, rng)
+        lights = LightMatrix(list(range(holes)), NullBackend())
+        self.moles = [Mole(lights, rng=rng) for _ in range(moles)]
+        self.scheduler = Scheduler(self.moles, self.grid)
+        self.ticks = 0
+
+    @property
+    def visible(self):
+        return [f.visible for f in self.moles]
+
+    def update(self, dt, level):
+        self.ticks += dt
+        self.scheduler.update(self.ticks, dt, level)
+
+    def is_hit(self, pos):
+        return self.scheduler.whack(pos, self.ticks)
+
+
+def play(engine, holes, seed, seconds=60):
+    """
+    Runs :engine: with a press on a random hole every 100ms
+    Returns tuple of spawns, steps moles were visible and hits
+    """
+
+    presses = random.Random(seed)
+    spawns = uptime = hits = 0
+    last = [False] * len(engine.visible)
+    for step in range(int(seconds * 1000 / Constants.GAMESTEP)):
+        engine.update(Constants.GAMESTEP, LEVEL)
+        visible = list(engine.visible)
+        spawns += sum(1 for a, b in zip(last, visible) if b and not a)
+        uptime += sum(visible)
+        last = visible
+        if step % 6 == 0 and engine.is_hit(presses.randrange(holes)) == 1:
+            hits += 1
+    return (spawns, uptime, hits)
+
+
+def compare():
+    matched = True
+    print("{:>6} {:>6} {:>22} {:>22} {:>22}".format("Moles", "Holes", "Spawns (obj / numpy)",
+                                                   "Uptime (obj / numpy)", "Hits (obj / numpy)"))
+    for moles, holes in COMPARE:
+        objects = [play(MoleObjects(moles, holes, f), holes, f) for f in range(COMPARESEEDS)]
+        arrays = [play(MoleArray(moles, holes, f), holes, f) for f in range(COMPARESEEDS)]
+        row = []
+        for index in range(3):
+            a = sum(f[index] for f in objects) / COMPARESEEDS
+            b = sum(f[index] for f in arrays) / COMPARESEEDS
+            matched = matched and abs(a - b) <= COMPARETOLERANCE * max(a, b)
+            row.append("{:,.1f} / {:,.1f}".format(a, b))
+        print("{:>6} {:>6} {:>22} {:>22} {:>22}".format(moles, holes, *row))
+    print("Match within {:.0%}: {}".format(COMPARETOLERANCE, "yes" if matched else "NO"))
+    return matched
+
+
+def step_ms(engine, steps):
+    start = perf_counter()
+    for _ in range(steps):
+        engine.update(Constants.GAMESTEP, LEVEL)
+    return (perf_counter() - start) / steps * 1000
+
+
+def main():
+    matched = compare()
+
+    print()
+    print("{:>6} {:>6} {:>14} {:>14}".format("Holes", "Moles", "Objects step", "NumPy step"))
+    for holes in HOLES:
+        moles = max(holes // 3, 1)
+        steps = max(60000 // holes, 20)
+        print("{:>6} {:>6} {:>12.3f}ms {:>12.3f}ms".format(holes, moles, step_ms(MoleObjects(moles, holes, 0), steps),
+                                                          step_ms(MoleArray(moles, holes, 0), steps)))
+
+    return matched
+
+
+if __name__ == "__main__":
+    exit(0 if main() else 1)
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+"""
+Plays a real game with a bot, headless unless SDL_VIDEODRIVER is set, and reports latencies and frame times
+
+    python bot.py [--timer 20] [--rows 8 --columns 8 --moles 40] [--pointer 0.5] [--threaded]
+"""
+
+from os import environ
+
+environ.setdefault("SDL_VIDEODRIVER", "dummy")
+environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from whackamole.bot import main
+
+if __name__ == "__main__":
+    main()
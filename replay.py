@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+"""
+Records a game, or plays one back exactly
+
+    python replay.py record game.jsonl [--seed 1] [--timer 60]
+    python replay.py play game.jsonl [--hash]
+
+Playing back prints the result and, with --hash, a CRC32 of every frame drawn
+Two playbacks of the same recording draw the same frames, with DEBUGMODE off (the readout shows FPS)
+"""
+
+import argparse
+from sys import exit
+
+from whackamole import Game
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or play back a game")
+    parser.add_argument("mode", choices=["record", "play"])
+    parser.add_argument("file")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the moles when recording")
+    parser.add_argument("--timer", type=int, default=60, help="game length in seconds when recording")
+    parser.add_argument("--hash", action="store_true", help="hash the frames drawn when playing")
+    args = parser.parse_args()
+
+    if args.mode == "record":
+        game = Game(timer=args.timer, seed=args.seed, record=args.file)
+        print("seed: {}".format(game.seed))
+        print("steps: {}".format(game.steps))
+        print("hits: {}".format(game.score.hits))
+        print("misses: {}".format(game.score.misses))
+        return
+
+    game = Game(replay=args.file, hash_frames=args.hash)
+    print("seed: {}".format(game.seed))
+    print("steps: {}".format(game.steps))
+    print("hits: {}".format(game.score.hits))
+    print("misses: {}".format(game.score.misses))
+    if game.player.digest is not None:
+        print("frames: {:08x}".format(game.player.digest))
+
+    # Check the game came out the same as when it was recorded
+    end = game.player.end
+    if end is not None and (end["hits"], end["misses"]) != (game.score.hits, game.score.misses):
+        print("recorded hits: {}, misses: {}, replay differs".format(end["hits"], end["misses"]))
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+"""
+Regression tests of the game rules, headless and seeded.
+Run from the repository root: python -m pytest
+"""
+
+from whackamole.constants import Constants
+from whackamole.lightMatrix import LightMatrix, MockBackend
+from whackamole.simulation import Simulation
+from whackamole.vectorized import MoleArray
+
+
+def test_sunk_mole_misses():
+    """
+    A hole is held through its mole's cooldown, whacking it then is a miss, not a hit
+    """
+
+    simulation = Simulation(timer=60, seed=1)
+    simulation.press(-1)
+    mole = simulation.moles[0]
+    while mole.cooldown is None:
+        simulation.update(Constants.GAMESTEP)
+
+    assert simulation.press(mole.position) == (False, True)
+    assert simulation.score.hits == 0
+
+
+def test_sunk_mole_misses_array():
+    """
+    The same for the NumPy engine, so both score the same way
+    """
+
+    engine = MoleArray(1, 9, 1)
+    while not engine.cooldown_set[0]:
+        engine.update(Constants.GAMESTEP, 1)
+
+    assert engine.is_hit(int(engine.position[0])) is False
+
+
+def test_lights_follow_holes(monkeypatch):
+    """
+    With several moles, the lights lit are the holes held by moles, every step and across a reset
+    """
+
+    monkeypatch.setattr(Constants, "MOLECOUNT", 5)
+    light_matrix = LightMatrix(backend=MockBackend())
+    simulation = Simulation(timer=60, light_matrix=light_matrix, seed=3)
+    simulation.press(-1)
+
+    for step in range(4000):
+        if step == 2000:
+            simulation.reset()
+            simulation.press(-1)
+        simulation.update(Constants.GAMESTEP)
+        if step % 7 == 0:
+            simulation.press(step % 9)
+        light_matrix.flush()
+
+        lights = light_matrix.backend.state
+        lit = {pos for pos, on in enumerate(lights) if on}
+        held = {pos for pos in range(len(lights)) if simulation.grid.owner(pos) is not None}
+        assert lit == held, "step {}".format(step)
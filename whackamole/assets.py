@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+from hashlib import sha1
+from os import makedirs, path, replace
+
+from pygame import image, transform
+
+from .constants import Constants
+
+
+class Assets:
+    """
+    Handles loading images, each is loaded, scaled and converted once then shared
+    Images are cached on the class, so are shared by every instance
+    Decoding can be done on any thread, the display mode must be set before converting
+    """
+
+    # Decoded and scaled images, not yet converted, keyed by (file, size)
+    decoded = {}
+
+    # Loaded images, keyed by (file, size, alpha)
+    images = {}
+
+    # Clipped animation frames, keyed by (file, size, offsets)
+    animations = {}
+
+    def image(self, file, size, alpha=True):
+        """
+        Loads :file: scaled to :size:, converted to the display format
+        :alpha: keeps per-pixel transparency, turn off for opaque images to blit faster
+        Returns PyGame surface, which must not be drawn on
+        """
+
+        key = (file, tuple(size), alpha)
+        if key not in self.images:
+            img = self.decode(file, size)
+            img = img.convert_alpha() if alpha else img.convert()
+            self.images[key] = img
+
+        return self.images[key]
+
+    def decode(self, file, size):
+        """
+        Loads :file: scaled to :size: without converting, so it is safe off the main thread
+        With IMAGECACHE set, scaled images are kept on disk keyed by the file's hash and the size
+        Returns PyGame surface
+        """
+
+        key = (file, tuple(size))
+        if key not in self.decoded:
+            if Constants.IMAGECACHE:
+                self.decoded[key] = self.decode_cached(file, size, Constants.IMAGECACHE)
+            else:
+                self.decoded[key] = transform.scale(image.load(file), size)
+
+        return self.decoded[key]
+
+    def decode_cached(self, file, size, directory):
+        with open(file, "rb") as f:
+            digest = sha1(f.read()).hexdigest()
+        cached = path.join(directory, "{}-{}x{}.rgba".format(digest, *size))
+
+        if path.exists(cached):
+            with open(cached, "rb") as f:
+                return image.frombytes(f.read(), size, "RGBA")
+
+        img = transform.scale(image.load(file), size)
+
+        # Written aside then moved, so a half written file is never read
+        makedirs(directory, exist_ok=True)
+        with open(cached + ".tmp", "wb") as f:
+            f.write(image.tobytes(img, "RGBA"))
+        replace(cached + ".tmp", cached)
+
+        return img
+
+    def frames(self, file, size, offsets):
+        """
+        Loads :file: scaled to :size:, clipped for each frame of an animation sinking it by :offsets: px
+        The frames are views of the same image, so cost no extra memory
+        Returns list of PyGame surfaces, one per offset
+        """
+
+        key = (file, tuple(size), tuple(offsets))
+        if key not in self.animations:
+            img = self.image(file, size)
+            width, height = img.get_size()
+            self.animations[key] = [img.subsurface((0, 0, width, max(height - int(f), 0))) for f in offsets]
+
+        return self.animations[key]
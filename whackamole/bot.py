@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+import random
+from argparse import ArgumentParser
+from heapq import heappush, heappop
+from statistics import pstdev
+from threading import Thread
+from time import perf_counter, sleep
+
+from pygame import event, KEYDOWN, MOUSEBUTTONDOWN, QUIT, K_s
+
+from .constants import Constants
+from .game import Game
+from .simulation import percentile
+
+
+def time_presses(game, latencies):
+    """
+    Wraps :game:'s loop_presses to add the ms from each press's stamp to it being judged onto :latencies:
+    The score changes as a press is judged, so this is the time from input to score
+    """
+
+    judge = game.loop_presses
+
+    def loop_presses(until):
+        waiting = [f[0] for f in game.presses]
+        result = judge(until)
+        now = perf_counter() * 1000
+        latencies.extend(now - f for f in waiting[:len(waiting) - len(game.presses)])
+        return result
+
+    game.loop_presses = loop_presses
+
+
+class Bot:
+    """
+    Plays a real Game through pygame's event queue, as a player at the keyboard or touchscreen would
+    Watches the snapshots the game draws, and whacks each mole it sees after a reaction time,
+    normally distributed by :spread:, picking the right hole with a chance of :accuracy:
+    A :pointer: share of presses are clicks rather than keys, holes without a key are always clicked
+    Times each mole from being seen to being shown hit, each press from being posted to changing the score,
+    and each frame, which the game must be made with autostart off for
+    """
+
+    def __init__(self, game, *, reaction=400, spread=100, accuracy=0.9, pointer=0.0, seed=None, poll=1):
+        self.game = game
+        self.reaction = reaction
+        self.spread = spread
+        self.accuracy = accuracy
+        self.pointer = pointer
+
+        # ms between looks at the game
+        self.poll = poll
+
+        # The bot gets its own random, so doesn't change the moles
+        self.rng = random.Random(seed)
+
+        # Key for each hole
+        self.keys = {pos: key for key, pos in game.keys.items()}
+
+        # Moles up, index -> [perf_counter ms first seen, if seen hit], and presses to make, [due ms, order, hole]
+        self.seen = {}
+        self.pending = []
+        self.order = 0
+
+        # Game started with, so the title screen is only pressed through once
+        self.started = None
+
+        # Results, ms, and visible moles each frame
+        self.spawn_to_hit = []
+        self.event_to_score = []
+        self.frames = []
+        self.active = []
+
+        # Score changes as presses are judged
+        time_presses(game, self.event_to_score)
+
+        # Frames are timed between being shown
+        present = game.renderer.present
+        self.last_frame = None
+
+        def frame():
+            present()
+            now = perf_counter() * 1000
+            if self.last_frame is not None:
+                self.frames.append(now - self.last_frame)
+                self.active.append(len(game.latest[0].moles) if game.latest else 0)
+            self.last_frame = now
+
+        game.renderer.present = frame
+
+        self.running = False
+        self.thread = Thread(target=self.run, name="bot", daemon=True)
+
+    def start(self):
+        self.running = True
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+
+    def run(self):
+        last = None
+        while self.running:
+            now = perf_counter() * 1000
+
+            # Only what has been drawn is seen
+            latest = self.game.latest
+            if latest is not None and latest[0] is not last:
+                last = latest[0]
+                self.watch(last, now)
+
+            while self.pending and self.pending[0][0] <= now:
+                self.post(heappop(self.pending)[2], now)
+
+            sleep(self.poll / 1000)
+
+    def watch(self, snapshot, now):
+        """
+        Looks at :snapshot:, aiming at new moles and timing ones shown hit
+        """
+
+        # Press through the title, once per game, and close the game when it's over
+        if snapshot.state == "title" and self.started != snapshot.games:
+            self.started = snapshot.games
+            event.post(event.Event(KEYDOWN, key=K_s, pressed=now))
+        if snapshot.state == "gameover":
+            event.post(event.Event(QUIT))
+            self.running = False
+            return
+
+        shown = set()
+        for mole in snapshot.moles:
+            shown.add(mole.index)
+            seen = self.seen.get(mole.index)
+            if seen is None:
+                self.seen[mole.index] = [now, mole.hit]
+
+                # Aim, wrong with a chance of missing
+                hole = mole.hole
+                holes = len(snapshot.holes)
+                if holes > 1 and self.rng.random() >= self.accuracy:
+                    hole = (hole + self.rng.randrange(1, holes)) % holes
+                due = now + max(self.rng.gauss(self.reaction, self.spread), 0)
+                heappush(self.pending, [due, self.order, hole])
+                self.order += 1
+
+            elif mole.hit and not seen[1]:
+                seen[1] = True
+                self.spawn_to_hit.append(now - seen[0])
+
+        # Gone back down, next time up is a new mole
+        for index in list(self.seen):
+            if index not in shown:
+                del self.seen[index]
+
+    def post(self, hole, now):
+        """
+        Whacks :hole: with its key, or a click on it, stamped :now: as a player's input would be
+        """
+
+        key = self.keys.get(hole)
+        if key is not None and self.rng.random() >= self.pointer:
+            event.post(event.Event(KEYDOWN, key=key, pressed=now))
+            return
+
+        x, y = self.game.latest[0].holes[hole]
+        pos = (x + Constants.HOLEWIDTH / 2, y + Constants.HOLEHEIGHT / 2)
+        event.post(event.Event(MOUSEBUTTONDOWN, pos=pos, button=Constants.LEFTMOUSEBUTTON, pressed=now))
+
+    def report(self):
+        """
+        Gets percentiles of the latencies and frame times, ms
+        Returns dict of results
+        """
+
+        return {
+            "hits": self.game.score.hits,
+            "misses": self.game.score.misses,
+            "spawn_to_hit_p50": percentile(self.spawn_to_hit, 50),
+            "spawn_to_hit_p90": percentile(self.spawn_to_hit, 90),
+            "event_to_score_p50": percentile(self.event_to_score, 50),
+            "event_to_score_p99": percentile(self.event_to_score, 99),
+            "event_to_score_max": max(self.event_to_score, default=0),
+            "frame_p50": percentile(self.frames, 50),
+            "frame_p99": percentile(self.frames, 99),
+            "frame_max": max(self.frames, default=0),
+            "frame_stdev": pstdev(self.frames) if self.frames else 0,
+            "moles_active_mean": sum(self.active) / len(self.active) if self.active else 0,
+        }
+
+
+def main():
+    parser = ArgumentParser(description="Play a real game with a bot and report latencies and frame times")
+    parser.add_argument("--timer", type=int, default=20, help="game length in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rows", type=int, default=Constants.HOLEROWS)
+    parser.add_argument("--columns", type=int, default=Constants.HOLECOLUMNS)
+    parser.add_argument("--moles", type=int, default=Constants.MOLECOUNT)
+    parser.add_argument("--reaction", type=float, default=400, help="mean bot reaction time, ms")
+    parser.add_argument("--spread", type=float, default=100, help="standard deviation of reaction time, ms")
+    parser.add_argument("--accuracy", type=float, default=0.9, help="chance of whacking the right hole")
+    parser.add_argument("--pointer", type=float, default=0.0, help="share of presses made by clicking")
+    parser.add_argument("--threaded", action="store_true", help="step the simulation on its own thread")
+    args = parser.parse_args()
+
+    # Headless, with a screen big enough for every hole and no lights or buttons to claim
+    Constants.BOARDBACKEND = "none"
+    Constants.HOLEROWS, Constants.HOLECOLUMNS = args.rows, args.columns
+    Constants.MOLECOUNT = min(args.moles, args.rows * args.columns)
+    Constants.GAMEWIDTH = max(Constants.GAMEWIDTH, args.columns * (Constants.HOLEWIDTH + 10))
+    Constants.GAMEHEIGHT = max(Constants.GAMEHEIGHT, args.rows * (Constants.HOLEWIDTH + 10))
+    Constants.GAMETHREADED = args.threaded
+
+    game = Game(timer=args.timer, autostart=False, seed=args.seed)
+    bot = Bot(game, reaction=args.reaction, spread=args.spread, accuracy=args.accuracy, pointer=args.pointer,
+              seed=args.seed)
+    bot.start()
+    game.run()
+    bot.stop()
+
+    for key, val in bot.report().items():
+        print("{}: {}".format(key, round(val, 3) if isinstance(val, float) else val))
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+from queue import SimpleQueue, Empty
+from time import perf_counter
+
+from .constants import Constants
+from .lightMatrix import board_backend
+
+
+class Buttons:
+    """
+    Handles the physical buttons next to the lights
+    Presses are timestamped and debounced in the thread that sees them, then queued for the main loop
+    Timestamps are perf_counter ms, the same clock Game keeps the simulation against
+    """
+
+    def __init__(self, pins: list = Constants.BUTTONPINS, gpio: bool = None):
+        # Presses waiting for the main loop, (timestamp, pos)
+        self.queue = SimpleQueue()
+
+        # Last accepted press per button, for debouncing
+        self.last = [None] * len(pins)
+
+        # Called after a press is queued, to wake a main loop waiting for input
+        self.wake = None
+
+        # Edge triggered callbacks on the Pi's GPIO
+        self.buttons = []
+        if gpio if gpio is not None else board_backend() == "gpio":
+            from gpiozero import Button  # Only needed on the Pi
+
+            for pos, pin in enumerate(pins):
+                button = Button(pin)
+                button.when_pressed = self.callback(pos)
+                self.buttons.append(button)
+
+    def callback(self, pos):
+        def pressed():
+            self.press(pos)
+        return pressed
+
+    def press(self, pos, timestamp=None):
+        """
+        Queues a press of button :pos:, safe to call from any thread
+        Presses within BUTTONDEBOUNCE ms of the last accepted one are ignored
+        """
+
+        if timestamp is None:
+            timestamp = perf_counter() * 1000
+
+        last = self.last[pos]
+        if last is not None and timestamp - last < Constants.BUTTONDEBOUNCE:
+            return
+        self.last[pos] = timestamp
+
+        self.queue.put((timestamp, pos))
+        if self.wake:
+            self.wake()
+
+    def get(self):
+        """
+        Takes every press queued so far
+        Returns list of (timestamp, pos)
+        """
+
+        presses = []
+        while True:
+            try:
+                presses.append(self.queue.get_nowait())
+            except Empty:
+                return presses
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+from os import makedirs, path
+from queue import SimpleQueue, Empty
+from shlex import split
+from subprocess import Popen, PIPE
+from threading import Thread
+from time import perf_counter
+from warnings import warn
+
+from pygame import image, error
+
+from .constants import Constants
+from .telemetry import Overhead
+
+
+class Capture(Overhead):
+    """
+    Records the frames shown, without the game loop ever waiting on an encoder
+    Each frame is copied into one of a pool of preallocated surfaces, which a background thread encodes,
+    to numbered PNGs in :directory: and/or as raw RGB piped to :command:
+    If every surface is waiting to be encoded, new frames are dropped and counted
+    Frames are shown irregularly, idle screens only redraw on input, so the pipe is fed at a steady GAMEMAXFPS,
+    repeating the last frame over slots nothing was shown in or only dropped frames were
+    """
+
+    def __init__(self, screen, *, directory: str = None, command: str = None, buffers: int = Constants.CAPTUREBUFFERS):
+        self.directory = directory
+        if directory:
+            makedirs(directory, exist_ok=True)
+
+        # Encoder reading raw frames from stdin, told the size and rate
+        self.encoder = None
+        if command:
+            width, height = screen.get_size()
+            self.encoder = Popen(split(command.format(width=width, height=height, fps=Constants.GAMEMAXFPS)),
+                                 stdin=PIPE)
+
+        # Surfaces free to copy into, and copies waiting for the encoder, (frame, perf_counter s, surface)
+        self.free = SimpleQueue()
+        for _ in range(buffers):
+            self.free.put(screen.copy())
+        self.ready = SimpleQueue()
+
+        # Frame slot the pipe has been fed up to, from the first frame shown, and the raw frame last fed to it
+        self.start = None
+        self.slot = -1
+        self.last = None
+
+        # Frames shown, and of those encoded and lost to a full pool
+        self.frames = 0
+        self.encoded = 0
+        self.dropped = 0
+
+        # Last error from encoding, the frame is lost but capture carries on
+        self.error = None
+
+        # If the encoder has stopped reading, frames are no longer piped to it
+        self.broken = False
+
+        self.thread = Thread(target=self.encode_loop, name="capture", daemon=True)
+        self.thread.start()
+
+    def frame(self, surface):
+        """
+        Copies :surface: for the encoder, never blocks
+        """
+
+        start = perf_counter()
+
+        index = self.frames
+        self.frames += 1
+        try:
+            buffer = self.free.get_nowait()
+        except Empty:
+            self.dropped += 1
+        else:
+            # One copy of the raw pixels, the pool are copies of the screen so share its format, faster than a blit
+            memoryview(buffer.get_buffer())[:] = memoryview(surface.get_buffer())
+            self.ready.put((index, start, buffer))
+
+        self.overhead += perf_counter() - start
+
+    def encode(self, index, shown, surface):
+        if self.directory:
+            image.save(surface, path.join(self.directory, "frame{:06d}.png".format(index)))
+        if self.encoder and not self.broken:
+            try:
+                self.feed(shown, surface)
+            except OSError:
+                self.broken = True
+                raise
+        elif not self.directory:
+            return
+        self.encoded += 1
+
+    def feed(self, shown, surface):
+        """
+        Writes :surface:, :shown: at perf_counter s, to the pipe in the frame slot it was shown in
+        Slots missed since the last frame get the last frame again, so the video keeps real time
+        A frame shown in a slot already fed is left out
+        """
+
+        if self.start is None:
+            self.start = shown
+        slot = int((shown - self.start) * Constants.GAMEMAXFPS)
+        if slot <= self.slot:
+            return
+
+        if self.last is not None:
+            for _ in range(slot - self.slot - 1):
+                self.encoder.stdin.write(self.last)
+        self.last = image.tobytes(surface, "RGB")
+        self.encoder.stdin.write(self.last)
+        self.slot = slot
+
+    def encode_loop(self):
+        while True:
+            item = self.ready.get()
+            if item is None:
+                return
+
+            index, shown, buffer = item
+            try:
+                self.encode(index, shown, buffer)
+            except (OSError, ValueError, error) as e:
+                self.error = e
+            finally:
+                self.free.put(buffer)
+
+    def close(self):
+        """
+        Stops the encoder, encoding every frame still waiting
+        Warns if any frames were lost to errors or the encoder failed
+        """
+
+        self.ready.put(None)
+        self.thread.join()
+        if self.encoder:
+            try:
+                self.encoder.stdin.close()
+            except OSError as e:
+                self.error = e
+            if self.encoder.wait() and self.error is None:
+                self.error = "encoder exited with {}".format(self.encoder.returncode)
+
+        if self.error is not None:
+            warn("Capture encoded {} of {} frames, {} dropped, last error: {}".format(
+                self.encoded, self.frames, self.dropped, self.error))
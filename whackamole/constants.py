@@ -18,6 +18,11 @@ class GameConstants:
     GAMEWIDTH       = 500
     GAMEHEIGHT      = 500
     GAMEMAXFPS      = 60
+    GAMESTEP        = 1000 / 60 #ms simulated per update, independent of frame rate
+    GAMEMAXLAG      = 250 #ms, simulation time is dropped past this so it can't fall further behind
+    GAMEIDLE        = True # wait for input on the title and game over screens instead of redrawing
+    GAMEIDLETIMEOUT = 500 #ms, longest wait before the idle screen is redrawn
+    GAMETHREADED    = False # step the simulation on its own thread, drawing the latest snapshot of it
 
 
 class LevelConstants:
@@ -28,6 +33,7 @@ class LevelConstants:
     LEVELGAP        = 10 #score
     LEVELMOLESPEED  = 5 #% faster
     LEVELMOLECHANCE = 10 #% less
+    LEVELTABLE      = 30 # levels worked out up front, later ones when reached
 
 
 class HoleConstants:
@@ -52,6 +58,12 @@ class BoardConstants:
     """
 
     PINS        = [2, 3, 4, 17, 27, 22, 10, 9, 11]
+    # auto (gpio on a Pi, or with GPIOZERO_PIN_FACTORY set, where gpiozero can drive pins, else none), gpio, mock
+    # or none (no lights or buttons)
+    BOARDBACKEND = "auto"
+
+    BUTTONPINS  = [5, 6, 13, 19, 26, 21, 20, 16, 12] # next to each light
+    BUTTONDEBOUNCE = 50 #ms
 
 
 class MoleConstants:
@@ -62,6 +74,7 @@ class MoleConstants:
     MOLEWIDTH       = int( HoleConstants.HOLEWIDTH*(2/3) )
     MOLEHEIGHT      = int(MOLEWIDTH)
     MOLEDEPTH       = 15 #% of height
+    MOLEFRAMES      = 5 # frames to pop up, pre-rendered so more is smoother at no cost
     MOLECOOLDOWN    = 500 #ms
 
     MOLESTUNNED     = 1000 #ms
@@ -69,7 +82,7 @@ class MoleConstants:
     MOLEMISSHUD     = 250 #ms
 
     MOLECHANCE      = 1/30
-    MOLECOUNT       = 1  # Amount of moles, one mole so all holes are open each time. otherwise the keypress fails (position-hole mismatch)
+    MOLECOUNT       = 1  # Amount of moles, up to one per hole, presses are looked up by hole so any amount works
     MOLEUPMIN       = 0.3 #s
     MOLEUPMAX       = 2 #s
 
@@ -86,6 +99,55 @@ class TextConstants:
     TEXTTITLE       = "Whack a Mole"
     TEXTFONTSIZE    = 15
     TEXTFONTFILE    = "assets/OxygenMono-Regular.ttf"
+    TEXTGLYPHS      = "".join(chr(f) for f in range(32, 127)) # pre-rendered per size/color
+    TEXTCACHESIZE   = 32 # labels kept
+
+
+class SoundConstants:
+    """
+    Constants used for sound effects and music
+    """
+
+    SOUNDBASE       = "sounds/"
+
+    SOUNDHIT        = [SOUNDBASE + "hit1.ogg", SOUNDBASE + "hit2.ogg", SOUNDBASE + "hit3.ogg"]
+    SOUNDMISS       = [SOUNDBASE + "miss1.ogg", SOUNDBASE + "miss2.ogg", SOUNDBASE + "miss3.ogg"]
+    SOUNDLEVELUP    = SOUNDBASE + "levelUp.ogg"
+    SOUNDBACKGROUND = SOUNDBASE + "playBack.mp3"
+
+    SOUNDCHANNELS   = 4 # reserved for effects, oldest is cut off when all busy
+    SOUNDLATENCYSAMPLES = 20
+
+
+class TelemetryConstants:
+    """
+    Constants used for recording telemetry
+    """
+
+    TELEMETRYFILE   = None # file to record game events to, .bin for binary, None to not record
+    TELEMETRYBUFFER = 4096 # events held waiting for the writer
+    TELEMETRYINTERVAL = 0.5 #s between writes
+
+
+class ProfilerConstants:
+    """
+    Constants used for timing frames
+    """
+
+    PROFILEENABLED  = False # time each phase of the frame and show the percentiles
+    PROFILEWINDOW   = 600 # frames kept for percentiles
+    PROFILEREFRESH  = 30 # frames between working out percentiles
+    PROFILEFILE     = None # file to write the timings to on exit, None to not write
+
+
+class CaptureConstants:
+    """
+    Constants used for capturing gameplay
+    """
+
+    CAPTUREDIR      = None # directory to save every frame to as numbered PNGs, None to not save them
+    CAPTURECOMMAND  = None # encoder to pipe raw RGB frames to at a steady {fps}, {width} {height} filled in too, None to not pipe
+    CAPTUREBUFFERS  = 8 # frames held waiting for the encoder, frames past this are dropped
 
 
 class ImageConstants:
@@ -94,6 +156,7 @@ class ImageConstants:
     """
 
     IMAGEBASE       = "assets/"
+    IMAGECACHE      = None # directory to keep scaled images in between runs, None to not keep them
 
     IMAGEBACKGROUND = IMAGEBASE + "background.png"
 
@@ -116,11 +179,12 @@ class MalletConstants:
     MALLETROTHIT    = 30
 
 
-class Constants(GameConstants, LevelConstants, HoleConstants, BoardConstants, MoleConstants, TextConstants, ImageConstants, MalletConstants):
+class Constants(GameConstants, LevelConstants, HoleConstants, BoardConstants, MoleConstants, TextConstants, SoundConstants, TelemetryConstants, ProfilerConstants, CaptureConstants, ImageConstants, MalletConstants):
     """
     Stores all the constants used in the game
     """
 
     DEBUGMODE       = False
+    DIRTYRECTS      = False # only redraw and update regions that changed
     LEFTMOUSEBUTTON = 1
 
@@ -7,26 +7,47 @@ A simple Whack a Mole game written with PyGame
 :copyright: (c) 2018 Matt Cowley (IPv4)
 """
 
-from pygame import init, quit, display, image, transform, time, mixer, mouse, event, Surface, \
-    SRCALPHA, QUIT, KEYDOWN, \
+from pygame import init, quit, display, time, mixer, mouse, event, draw, transform, \
+    QUIT, KEYDOWN, MOUSEBUTTONDOWN, FINGERDOWN, NOEVENT, USEREVENT, \
     K_q, K_w, K_e, K_a, K_s, K_d, K_z, K_x, K_c, K_1, K_2, K_SPACE, K_ESCAPE
-from time import sleep
+from time import sleep, perf_counter, process_time
 from sys import exit
+from threading import Thread
+from queue import SimpleQueue, Empty
 from .constants import Constants
+from .lightMatrix import LightMatrix, BACKENDS, board_backend
+from .simulation import Simulation
+from .holes import HoleIndex
 from .mole import Mole
-from .lightMatrix import LightMatrix
 from .score import Score
+from .renderer import Renderer
+from .assets import Assets
+from .loader import Loader
 from .text import Text
-from random import choice
-from os import path
+from .buttons import Buttons
+from .telemetry import Telemetry
+from .replay import Recorder, Player
+from .profiler import Profiler
+from .capture import Capture
 
-class Game:
+class Game(Simulation):
     """
     Handles the main game
-    Takes :time: in seconds for game timer
+    Takes :time: in seconds for game timer, and a :seed: for the moles
+    Games can be saved to :record: and played back exactly from :replay:, which brings its own seed and timer
     """
 
-    def __init__(self, *, timer: int = None, autostart: bool = True):
+    # Hole each key whacks
+    keys = {K_q: 0, K_w: 1, K_e: 2,
+            K_a: 3, K_s: 4, K_d: 5,
+            K_z: 6, K_x: 7, K_c: 8}
+
+    def __init__(self, *, timer: int = None, autostart: bool = True, seed=None, record: str = None,
+                 replay: str = None, hash_frames: bool = False):
+        # Startup times in ms from here, to the first frame and to the first playable frame
+        self.created = perf_counter()
+        self.startup = {}
+
         # Init pygame
         init()
 
@@ -34,196 +55,257 @@ class Game:
         self.screen = display.set_mode((Constants.GAMEWIDTH, Constants.GAMEHEIGHT))
         display.set_caption(Constants.TEXTTITLE)
 
-        # Load background
-        self.img_background = image.load(Constants.IMAGEBACKGROUND)
-        self.img_background = transform.scale(self.img_background, (Constants.GAMEWIDTH, Constants.GAMEHEIGHT))
+        # Decode images and sounds on a worker, showing the loading screen until the images are ready
+        mole_size = (Constants.MOLEWIDTH, Constants.MOLEHEIGHT)
+        self.loader = Loader([
+            (Constants.IMAGEBACKGROUND, (Constants.GAMEWIDTH, Constants.GAMEHEIGHT)),
+            (Constants.IMAGEHOLE, (Constants.HOLEWIDTH, Constants.HOLEHEIGHT)),
+            (Constants.IMAGEMALLET, (Constants.MALLETWIDTH, Constants.MALLETHEIGHT)),
+            (Constants.IMAGEMOLENORMAL, mole_size),
+            (Constants.IMAGEMOLEHIT, mole_size),
+        ])
+        self.loop_loading()
 
+        # Load background
+        assets = Assets()
+        self.img_background = assets.image(Constants.IMAGEBACKGROUND, (Constants.GAMEWIDTH, Constants.GAMEHEIGHT),
+                                           alpha=False)
 
         # Load hole
-        self.img_hole = image.load(Constants.IMAGEHOLE)
-        self.img_hole = transform.scale(self.img_hole, (Constants.HOLEWIDTH, Constants.HOLEHEIGHT))
+        self.img_hole = assets.image(Constants.IMAGEHOLE, (Constants.HOLEWIDTH, Constants.HOLEHEIGHT))
+
+        # Load profiler, if timing frames
+        self.profiler = Profiler() if Constants.PROFILEENABLED else None
 
-        # Load lightMatrix
-        self.light_matrix = LightMatrix()
+        # Load renderer
+        self.renderer = Renderer(self.screen)
+        self.renderer.profiler = self.profiler
+
+        # Load capture, if recording the frames
+        self.capture = None
+        if Constants.CAPTUREDIR or Constants.CAPTURECOMMAND:
+            self.capture = Capture(self.screen, directory=Constants.CAPTUREDIR, command=Constants.CAPTURECOMMAND)
+        self.renderer.capture = self.capture
 
         # Load mallet
-        self.img_mallet = image.load(Constants.IMAGEMALLET)
-        self.img_mallet = transform.scale(self.img_mallet, (Constants.MALLETWIDTH, Constants.MALLETHEIGHT))
+        self.img_mallet = assets.image(Constants.IMAGEMALLET, (Constants.MALLETWIDTH, Constants.MALLETHEIGHT))
+
+        # Mallet drawn at the pointer instead of the cursor, held up and swung down
+        self.img_mallets = (transform.rotate(self.img_mallet, Constants.MALLETROTNORM),
+                            transform.rotate(self.img_mallet, Constants.MALLETROTHIT))
+        mouse.set_visible(False)
+
+        # Work out what drives the lights and buttons once, for both
+        self.board = board_backend()
+
+        # Load buttons, which wake the loop when idle
+        self.buttons = Buttons(gpio=self.board == "gpio")
+        self.buttons.wake = lambda: event.post(event.Event(USEREVENT))
+
+        # set sound, once the loader has it
+        self.sounds = None
 
-        # set sound
-        self.sounds_hit = [path.join("sounds", "hit1.ogg"), path.join("sounds", "hit2.ogg"),
-                           path.join("sounds", "hit3.ogg")]
-        self.sounds_miss = [path.join("sounds", "miss1.ogg"), path.join("sounds", "miss2.ogg"),
-                            path.join("sounds", "miss3.ogg")]
-        self.sound_background = path.join("sounds", "playBack.mp3")
-        self.sound_levelUp = path.join("sounds", "levelUp.ogg")
+        # Load telemetry, if recording
+        telemetry = None
+        if Constants.TELEMETRYFILE:
+            telemetry = Telemetry(Constants.TELEMETRYFILE, binary=Constants.TELEMETRYFILE.endswith(".bin"))
 
-        mixer.init()
-        mixer.music.load(self.sound_background)  # Paste The audio file location
+        # Time spent recording telemetry last frame, ms
+        self.telemetry_overhead = 0
 
-        # Set timer
-        self.timer = timer
+        # Load replay, which decides the seed and timer
+        self.player = None
+        if replay:
+            self.player = Player(replay, hash_frames)
+            seed = self.player.seed
+            timer = self.player.timer
 
-        # Reset/initialise data
-        self.reset()
+        # Simulation steps since created, what recordings are timed against
+        self.steps = 0
+
+        # CPU and wall time spent in each state, s, state -> [cpu, wall]
+        self.cpu = {}
+
+        # Set up the rules, with lightMatrix
+        super().__init__(timer=timer, light_matrix=LightMatrix(backend=BACKENDS[self.board]()), telemetry=telemetry,
+                         seed=seed)
+
+        # Start recording, if saving the game
+        self.record = record
+        self.recorder = Recorder(self.seed, self.timer) if record else None
+
+        # Score as last drawn, set from each snapshot
+        self.hud = Score(self.text)
+
+        # Game, level and end state last drawn, changes redraw the whole screen
+        self.drawn = None
+
+        # Latest snapshot drawn, or published for drawing when threaded, with the real time the simulation reached
+        # Events for the simulation thread when threaded
+        self.latest = None
+        self.inbox = SimpleQueue()
 
         # Run
         if autostart:
             self.run()
 
     def reset(self):
-        # Load moles
-        self.moles = [Mole(self.light_matrix) for _ in range(Constants.MOLECOUNT)]  # create a List
-
-        # Generate hole positions
-        self.holes = []
-        self.used_holes = []
-        base_row = Constants.GAMEHEIGHT / Constants.HOLEROWS
-        base_column = Constants.GAMEWIDTH / Constants.HOLECOLUMNS
-        for row in range(Constants.HOLEROWS):
-            rowY = base_row * row
-            rowY += (base_row - Constants.HOLEHEIGHT) / 2
-            for column in range(Constants.HOLECOLUMNS):
-                thisX = base_column * column
-                thisX += (base_column - Constants.HOLEWIDTH) / 2
-                self.holes.append((int(thisX), int(rowY)))
-
-        # Get the text object
-        self.text = Text()
-
-        # Get the score object
-        self.score = Score(self.text)
-
-        # Indicates whether the HUD indicators should be displayed
-        self.show_hit = 0
-        self.show_miss = 0
-
-        # Allow for game timer
-        self.timer_start = 0
+        super().reset()
 
-    @property
-    def timerData(self):
-        if self.timer is not None and self.timer_start != 0:
-            remain = (time.get_ticks() - self.timer_start) / 1000
-            remain = self.timer - remain
-            endGame = True if remain <= 0 else False
-            return (remain, endGame)
-        return (None, False)
+        # Presses waiting to be judged, (perf_counter ms, pos, key or -1 for a button or pointer)
+        self.presses = []
 
-    def loop_events(self):
+        # Hole under each point of the screen, a hole covers itself and the mole popping up from it
+        mole_height = Constants.MOLEHEIGHT * 1.2
+        area = (0, Constants.HOLEHEIGHT - mole_height, Constants.HOLEWIDTH, mole_height)
+        self.hole_index = HoleIndex(self.holes, area, (Constants.GAMEWIDTH, Constants.GAMEHEIGHT))
 
-        hit = False
-        miss = False
-        clicked = False
-        pos = -1
+    @property
+    def cpu_usage(self):
+        """
+        Gets the share of a CPU used in each state so far
+        Returns dict of state to float
+        """
+
+        return {state: cpu / wall if wall else 0 for state, (cpu, wall) in self.cpu.items()}
 
+    def loop_events(self, events=None):
         # Handle PyGame events
-        for e in event.get():  #returns a list of all the events that are currently in the event queue. Doing so empties the queue.
+        for e in (event.get() if events is None else events):  #returns a list of all the events that are currently in the event queue. Doing so empties the queue.
+            # Stamped by the main thread if forwarded to the simulation thread, or by whatever posted it
+            pressed = getattr(e, "pressed", perf_counter() * 1000)
 
             if e.type == QUIT:  # Handle quit exit button
                 self.loop = False
                 break
 
             gameTime, endGame = self.timerData
+            hole = self.pointer_hole(e)
 
             if not endGame:
 
-                if e.type == KEYDOWN:
-                    if e.key == K_q:
-                        pos = 0
-                    elif e.key == K_w:
-                        pos = 1
-                    elif e.key == K_e:
-                        pos = 2
-                    elif e.key == K_a:
-                        pos = 3
-                    elif e.key == K_s:
-                        pos = 4
-                    elif e.key == K_d:
-                        pos = 5
-                    elif e.key == K_z:
-                        pos = 6
-                    elif e.key == K_x:
-                        pos = 7
-                    elif e.key == K_c:
-                        pos = 8
-
-                    # Start timer if not started
-                    if self.timer is not None and self.timer_start == 0:
-                        self.timer_start = time.get_ticks()
-                    else:
-                        # Handle hit/miss
-                        clicked = True
-                        miss = True
-                        for mole in self.moles:
-                            if mole.is_hit(pos) == 1:  # Hit
-                                hit = True
-                                miss = False
-                            if mole.is_hit(pos) == 2:  # Hit but stunned
-                                miss = False
-                        if hit:
-                            self.score.hit()
-                            effect = mixer.Sound(choice(self.sounds_hit))
-                            effect.play(0)
-                        if miss:
-                            self.score.miss()
-                            effect = mixer.Sound(choice(self.sounds_miss))
-                            effect.play(0)
-
                 if e.type == KEYDOWN:
 
                     # Allow escape to abort attempt
                     if e.key == K_ESCAPE:  #to reset
+                        if self.recorder:
+                            self.recorder.key(self.steps, e.key)
                         self.reset()
                         break
 
+                    # Judged when the simulation reaches the time it was pressed
+                    self.presses.append((pressed, self.keys.get(e.key, -1), e.key))
+
+                # Whack the hole under a click or touch, each finger of a multi-touch burst is judged on its own
+                elif hole is not None:
+                    self.presses.append((pressed, hole, -1))
 
             # End game screen
             else:
                 if e.type == KEYDOWN:
                     if e.key == K_SPACE:    # Restart
+                        if self.recorder:
+                            self.recorder.key(self.steps, e.key)
                         self.reset()
                         break
 
-        return (clicked, hit, miss)
+                # Tap to restart, for touchscreens without a keyboard, recorded as the space it stands in for
+                elif hole is not None:
+                    if self.recorder:
+                        self.recorder.key(self.steps, K_SPACE)
+                    self.reset()
+                    break
 
-    def loop_display(self, clicked, hit, miss):
+        # Handle button presses, timestamped when pressed
         gameTime, endGame = self.timerData
+        buttons = self.buttons.get()
+        if not endGame:
+            self.presses.extend((pressed, pos, -1) for pressed, pos in buttons)
+            self.presses.sort()
+
+    def pointer_hole(self, e):
+        """
+        Gets the hole under a click or touch, looked up in the hole index so it costs the same on any board
+        Touches also come as clicks flagged as touch, which are skipped so they aren't judged twice
+        Returns hole id, -1 if not over a hole, or None if :e: isn't a click or touch
+        """
+
+        if e.type == MOUSEBUTTONDOWN and e.button == Constants.LEFTMOUSEBUTTON and not getattr(e, "touch", False):
+            return self.hole_index.hole_at(*e.pos)
+        if e.type == FINGERDOWN:
+            return self.hole_index.hole_at(e.x * Constants.GAMEWIDTH, e.y * Constants.GAMEHEIGHT)
+        return None
+
+    def loop_presses(self, until):
+        """
+        Judges the presses made before :until: (perf_counter ms) against the current simulation state
+        Presses that reach the simulation after the game has ended are dropped
+        Returns tuple of if anything was clicked, hit and missed
+        """
+
+        hit = False
+        miss = False
+        clicked = False
+
+        while self.presses and self.presses[0][0] < until:
+            pressed, pos, source = self.presses.pop(0)
+
+            gameTime, endGame = self.timerData
+            if endGame:
+                continue
+
+            # Record what was judged, on the step it was judged against
+            if self.recorder:
+                if source == -1:
+                    self.recorder.button(self.steps, pos)
+                else:
+                    self.recorder.key(self.steps, source)
+
+            # Start timer if not started, otherwise handle hit/miss
+            if self.timer is None or self.timer_start is not None:
+                clicked = True
+            this_hit, this_miss = self.press(pos)
+            if this_hit:
+                hit = True
+                if self.sounds:
+                    self.sounds.play("hit", pressed / 1000)
+            if this_miss:
+                miss = True
+                if self.sounds:
+                    self.sounds.play("miss", pressed / 1000)
+
+        return (clicked, hit, miss)
+
+    def loop_display(self, snapshot, alpha=1):
+        """
+        Draws :snapshot:, :alpha: of the way from the step before it to its step
+        Only the snapshot is read from the simulation, so it can be drawn while the simulation steps on
+        """
+
+        gameTime, endGame = snapshot.gameTime, snapshot.endGame
         if not gameTime and self.timer:
             gameTime = -1
 
-        # Display bg
-        self.screen.blit(self.img_background, (0, 0))
+        # Static board for a new game, everything else is drawn over it
+        # Redraw everything on a new game, level up and game end
+        if (snapshot.games, snapshot.level, endGame) != self.drawn:
+            if self.drawn is None or snapshot.games != self.drawn[0]:
+                self.renderer.compose([(self.img_background, (0, 0))] + [(self.img_hole, f) for f in snapshot.holes])
+            self.drawn = (snapshot.games, snapshot.level, endGame)
+            self.renderer.invalidate()
 
-        # Display holes
-        for position in self.holes:
-            self.screen.blit(self.img_hole, position)
+        # Sprites to draw over the board, (slot, surface, position)
+        sprites = []
 
         # Display moles
-        for mole in self.moles:
-            holes = [f for f in self.holes if f not in self.used_holes]
-            mole_display = mole.do_display(holes, self.score.level, not endGame)
-
-            # If new/old hole given
-            if len(mole_display) > 1:
-                if mole_display[1] == 0:  # New hole
-                    self.used_holes.append(mole_display[2])
-                else:  # Old hole
-                    if mole_display[2] in self.used_holes:
-                        self.used_holes.remove(mole_display[2])
-
-            # If should display
-            if mole_display[0]:
-                # Get pos and display
-                pos = mole.get_hole_pos(not endGame)
-                self.screen.blit(mole.image, pos)
-
-        # Fade screen if not started or has ended
+        for mole in snapshot.moles:
+            sprites.append((("mole", mole.index), Mole.frame_image(mole.hit, mole.frame), mole.get_hole_pos(alpha)))
+        if self.profiler:
+            self.profiler.mark(Profiler.MOLES)
+
+        # Fade screen if not started or has ended, only what changes under it is redrawn
         if self.timer and (endGame or gameTime == -1):
-            overlay = Surface((Constants.GAMEWIDTH, Constants.GAMEHEIGHT), SRCALPHA, 32)
-            overlay = overlay.convert_alpha()
-            overlay.fill((100, 100, 100, 0.9 * 255))
-            self.screen.blit(overlay, (0, 0))
+            sprites.append(("overlay", self.renderer.fill((100, 100, 100, 0.9 * 255)), (0, 0)))
 
         # Debug data for readout
         debug_data = {}
@@ -232,44 +314,51 @@ class Game:
                 "DEBUG": True,
                 "FPS": int(self.clock.get_fps()),
                 "MOLES": "{}/{}".format(Constants.MOLECOUNT, Constants.HOLEROWS * Constants.HOLECOLUMNS),
-                "KEYS": "E[H]R[M]T[M0]Y[M+5]U[M-5]I[H0]O[H+5]P[H-5]"
+                "KEYS": "E[H]R[M]T[M0]Y[M+5]U[M-5]I[H0]O[H+5]P[H-5]",
+                "SOUND": "{:.1f}ms".format(self.sounds.latency) if self.sounds else "loading",
+                "START": "{:.0f}/{:.0f}ms".format(self.startup.get("first_frame", 0),
+                                                  self.startup.get("interactive", 0))
             }
+            if self.telemetry:
+                debug_data["TELEMETRY"] = "{:.3f}ms".format(self.telemetry_overhead)
+            if self.capture:
+                capture = self.capture
+                debug_data["CAPTURE"] = "{:.3f}ms, {}/{} encoded, {} dropped".format(
+                    capture.take_overhead(), capture.encoded, capture.frames, capture.dropped)
+                if capture.error is not None:
+                    debug_data["CAPTURE"] += ", {}".format(capture.error)
+            if self.renderer.dirty:
+                debug_data["DIRTY"] = "{:.0%}".format(self.renderer.dirty_area)
+            debug_data["CPU"] = "{:.0%}".format(self.cpu_usage.get(snapshot.state, 0))
 
         # Display data readout
-        data = self.score.label(timer=gameTime, debug=debug_data, size=(1.5 if endGame else 1))
-        self.screen.blit(data, (5, 5))
+        self.hud.hits, self.hud.misses = snapshot.hits, snapshot.misses
+        data = self.hud.label(timer=gameTime, debug=debug_data, size=(1.5 if endGame else 1))
+        sprites.append(("data", data, (5, 5)))
 
         # Display hit/miss indicators
         if not endGame:
 
             # Hit indicator
-            if hit:
-                self.show_hit = time.get_ticks()
-            if self.show_hit > 0 and time.get_ticks() - self.show_hit <= Constants.MOLEHITHUD:
+            if snapshot.last_hit is not None and snapshot.ticks - snapshot.last_hit <= Constants.MOLEHITHUD:
                 hit_label = self.text.get_label("Hit!", scale=3, color=(255, 50, 0))
                 hit_x = (Constants.GAMEWIDTH - hit_label.get_width()) / 2
                 hit_y = (Constants.GAMEHEIGHT - hit_label.get_height()) / 2
-                self.screen.blit(hit_label, (hit_x, hit_y))
-            else:
-                self.show_hit = 0
+                sprites.append(("hit", hit_label, (hit_x, hit_y)))
 
             # Miss indicator
-            if miss:
-                self.show_miss = time.get_ticks()
-            if self.show_miss > 0 and time.get_ticks() - self.show_miss <= Constants.MOLEMISSHUD:
+            if snapshot.last_miss is not None and snapshot.ticks - snapshot.last_miss <= Constants.MOLEMISSHUD:
                 miss_label = self.text.get_label("Miss!", scale=2, color=(0, 150, 255))
                 miss_x = (Constants.GAMEWIDTH - miss_label.get_width()) / 2
                 miss_y = (Constants.GAMEHEIGHT + miss_label.get_height()) / 2
-                self.screen.blit(miss_label, (miss_x, miss_y))
-            else:
-                self.show_miss = 0
+                sprites.append(("miss", miss_label, (miss_x, miss_y)))
 
         # Click to start indicator
         if self.timer and gameTime == -1:
             timer_label = self.text.get_label("Click to begin...", scale=2, color=(0, 255, 255))
             timer_x = (Constants.GAMEWIDTH - timer_label.get_width()) / 2
             timer_y = (Constants.GAMEHEIGHT - timer_label.get_height()) / 2
-            self.screen.blit(timer_label, (timer_x, timer_y))
+            sprites.append(("begin", timer_label, (timer_x, timer_y)))
 
         # Time's up indicator
         if self.timer and endGame:
@@ -282,25 +371,349 @@ class Game:
             timer_y_1 = (Constants.GAMEHEIGHT / 2) - timer_label_1.get_height()
             timer_y_2 = (Constants.GAMEHEIGHT / 2)
 
-            self.screen.blit(timer_label_1, (timer_x_1, timer_y_1))
-            self.screen.blit(timer_label_2, (timer_x_2, timer_y_2))
+            sprites.append(("end1", timer_label_1, (timer_x_1, timer_y_1)))
+            sprites.append(("end2", timer_label_2, (timer_x_2, timer_y_2)))
+
+        # Mallet over the pointer while it's in the window, swung down while pressed
+        if mouse.get_focused():
+            mallet = self.img_mallets[mouse.get_pressed()[0]]
+            x, y = mouse.get_pos()
+            sprites.append(("mallet", mallet, (x - mallet.get_width() / 2, y - mallet.get_height() / 2)))
+
+        # Frame timings, only change when the percentiles are refreshed
+        if self.profiler:
+            profile_label = self.text.get_label(self.profiler.overlay(), "/", width=Constants.GAMEWIDTH,
+                                                background=(0, 0, 0, 0.4 * 255))
+            sprites.append(("profile", profile_label, (5, Constants.GAMEHEIGHT - profile_label.get_height() - 5)))
+            self.profiler.mark(Profiler.HUD)
+
+        # Draw the frame
+        self.renderer.draw(sprites)
+
+    def loop_loading(self):
+        """
+        Shows a loading bar until the images are decoded, the window can be closed meanwhile
+        """
+
+        text = Text()
+        while True:
+            self.screen.fill((0, 0, 0))
+            label = text.get_label("Loading...", scale=2, color=(0, 255, 255))
+            label_x = (Constants.GAMEWIDTH - label.get_width()) / 2
+            label_y = (Constants.GAMEHEIGHT / 2) - label.get_height()
+            self.screen.blit(label, (label_x, label_y))
+
+            bar_width = Constants.GAMEWIDTH / 2
+            draw.rect(self.screen, (0, 255, 255), ((Constants.GAMEWIDTH - bar_width) / 2, Constants.GAMEHEIGHT / 2,
+                                                   bar_width * self.loader.progress, 10))
+            display.flip()
+
+            if "first_frame" not in self.startup:
+                self.startup["first_frame"] = (perf_counter() - self.created) * 1000
+
+            if self.loader.images_ready.wait(1 / Constants.GAMEMAXFPS):
+                break
+
+            for e in event.get():
+                if e.type == QUIT:
+                    quit()
+                    exit()
+
+        self.loader.check()
+
+    def loop_loaded(self):
+        """
+        Starts the sounds once the loader has them, play doesn't wait for them
+        """
+
+        if self.sounds is None and self.loader.sounds_ready.is_set():
+            self.loader.check()
+            self.sounds = self.loader.sounds
+            mixer.music.play(0)
+
+    def loop_idle(self):
+        """
+        Draws the static screen then sleeps until an event arrives, or GAMEIDLETIMEOUT passes
+        The simulation is held still, so presses are judged as soon as they arrive
+        """
+
+        self.latest = (self.snapshot(), perf_counter() * 1000)
+        self.loop_display(self.latest[0])
+        self.clock.tick()
+        self.renderer.present()
+        self.light_matrix.flush()
+        if self.profiler:
+            self.profiler.mark(Profiler.FLIP)
+
+        woke = event.wait(Constants.GAMEIDLETIMEOUT)
+        if self.profiler:
+            self.profiler.mark(Profiler.WAIT)
+
+        self.loop_events([] if woke.type == NOEVENT else [woke] + event.get())
+        self.loop_presses(float("inf"))
+        if self.profiler:
+            self.profiler.mark(Profiler.EVENTS)
+            self.profiler.end_frame()
 
     def start(self):
+        if Constants.GAMETHREADED:
+            return self.start_threaded()
+
         self.clock = time.Clock()
         self.loop = True
 
+        # Real time the simulation has reached, perf_counter ms
+        simulated = perf_counter() * 1000
+
+        # Start of this frame, for CPU use per state
+        cpu = process_time()
+        wall = perf_counter()
+
         while self.loop:
+            state = self.state
+
+            # Nothing moves on the title and game over screens, so wait for input rather than redraw
+            # Play picks up from when input arrives, rather than catching up the time spent waiting
+            if Constants.GAMEIDLE and state != "playing":
+                self.loop_idle()
+                simulated = perf_counter() * 1000
+                cpu, wall = self.loop_usage(state, cpu, wall)
+                continue
+
             # Do all events
-            clicked, hit, miss = self.loop_events()
+            self.loop_events()
+            if self.profiler:
+                self.profiler.mark(Profiler.EVENTS)
+
+            # Catch the simulation up in fixed steps, dropping time if too far behind
+            # Presses are judged against the step they were made in, so frame jitter doesn't change the result
+            now = perf_counter() * 1000
+            simulated = max(simulated, now - Constants.GAMEMAXLAG)
+            steps = 0
+            while simulated + Constants.GAMESTEP <= now:
+                self.loop_presses(simulated + Constants.GAMESTEP)
+                self.update(Constants.GAMESTEP)
+                self.steps += 1
+                simulated += Constants.GAMESTEP
+                steps += 1
+            self.loop_presses(now)
+            if self.profiler:
+                self.profiler.mark(Profiler.UPDATE)
 
             # Do all render
-            self.loop_display(clicked, hit, miss)
+            self.latest = (self.snapshot(), simulated)
+            self.loop_display(self.latest[0], (now - simulated) / Constants.GAMESTEP)
 
             # Update display
             self.clock.tick(Constants.GAMEMAXFPS)
-            display.flip()
+            if self.profiler:
+                self.profiler.mark(Profiler.WAIT)
+            self.renderer.present()
+            self.light_matrix.flush()
+            if self.profiler:
+                self.profiler.mark(Profiler.FLIP)
+                self.profiler.end_frame()
+
+            # Record the frame
+            if self.telemetry:
+                self.telemetry.record(Telemetry.FRAME, self.ticks, self.clock.get_time(), steps)
+                self.telemetry_overhead = self.telemetry.take_overhead()
+
+            cpu, wall = self.loop_usage(state, cpu, wall)
+
+    def start_threaded(self):
+        """
+        Steps the simulation on its own thread at a fixed rate, while this thread draws the latest snapshot of it
+        A slow frame no longer holds up input, presses are judged on the simulation thread as they arrive
+        SDL only gives events to the main thread, so keys are stamped here and forwarded, buttons go straight there
+        Frames aren't recorded to telemetry, which takes records from one thread
+        """
+
+        self.clock = time.Clock()
+        self.loop = True
+        self.latest = (self.snapshot(), perf_counter() * 1000)
+        self.buttons.wake = lambda: self.inbox.put(None)
+
+        simulation = Thread(target=self.loop_simulate, name="simulation", daemon=True)
+        simulation.start()
+
+        # Start of this frame, for CPU use per state
+        cpu = process_time()
+        wall = perf_counter()
+
+        while self.loop:
+            self.loop_forward(event.get())
+            if self.profiler:
+                self.profiler.mark(Profiler.EVENTS)
+
+            snapshot, simulated = self.latest
+
+            # Wait for input on the title and game over screens, the simulation thread wakes us once it's handled
+            if Constants.GAMEIDLE and snapshot.state != "playing":
+                self.loop_display(snapshot)
+                self.clock.tick()
+                self.renderer.present()
+                if self.profiler:
+                    self.profiler.mark(Profiler.FLIP)
+
+                woke = event.wait(Constants.GAMEIDLETIMEOUT)
+                self.loop_forward([woke] + event.get())
+                if self.profiler:
+                    self.profiler.mark(Profiler.WAIT)
+                    self.profiler.end_frame()
+
+                cpu, wall = self.loop_usage(snapshot.state, cpu, wall)
+                continue
+
+            # Draw the latest step, moving on towards the next one until it's published
+            alpha = min((perf_counter() * 1000 - simulated) / Constants.GAMESTEP, 1)
+            self.loop_display(snapshot, alpha)
+
+            self.clock.tick(Constants.GAMEMAXFPS)
+            if self.profiler:
+                self.profiler.mark(Profiler.WAIT)
+            self.renderer.present()
+            if self.profiler:
+                self.profiler.mark(Profiler.FLIP)
+                self.profiler.end_frame()
+
+            cpu, wall = self.loop_usage(snapshot.state, cpu, wall)
+
+        self.inbox.put(None)
+        simulation.join()
+
+    def loop_forward(self, events):
+        """
+        Passes the events the simulation handles to its thread, stamped now as they would be if judged here
+        Events posted already stamped, such as by a bot, keep their stamp
+        """
+
+        for e in events:
+            if e.type == QUIT:
+                self.loop = False
+            if e.type in (QUIT, KEYDOWN, MOUSEBUTTONDOWN, FINGERDOWN):
+                if not hasattr(e, "pressed"):
+                    e.pressed = perf_counter() * 1000
+                self.inbox.put(e)
+
+    def loop_simulate(self):
+        """
+        Steps the simulation in fixed steps on its own thread, publishing a snapshot after each batch of steps
+        Sleeps until the next step is due or an input arrives, so inputs never wait on a frame being drawn
+        """
+
+        # Real time the simulation has reached, perf_counter ms
+        simulated = perf_counter() * 1000
+
+        # Inputs taken while sleeping, None for a button press
+        events = []
+
+        while self.loop:
+            self.loop_events([f for f in events if f is not None])
+            now = perf_counter() * 1000
+
+            # Nothing moves on the title and game over screens, presses are judged as they arrive
+            idle = Constants.GAMEIDLE and self.state != "playing"
+            if idle:
+                self.loop_presses(float("inf"))
+                simulated = now
+
+            # Catch up in fixed steps, judging presses against the step they were made in
+            else:
+                simulated = max(simulated, now - Constants.GAMEMAXLAG)
+                while simulated + Constants.GAMESTEP <= now:
+                    self.loop_presses(simulated + Constants.GAMESTEP)
+                    self.update(Constants.GAMESTEP)
+                    self.steps += 1
+                    simulated += Constants.GAMESTEP
+                self.loop_presses(now)
+            self.light_matrix.flush()
+
+            # Published whole, a snapshot is never changed once the render thread can see it
+            self.latest = (self.snapshot(), simulated)
+
+            # Wake the render thread if it's waiting on a static screen that may have changed
+            if events and Constants.GAMEIDLE:
+                event.post(event.Event(USEREVENT))
+
+            # Sleep until the next step, or an input
+            events = []
+            idle = Constants.GAMEIDLE and self.state != "playing"
+            timeout = Constants.GAMEIDLETIMEOUT if idle else simulated + Constants.GAMESTEP - perf_counter() * 1000
+            try:
+                events.append(self.inbox.get(timeout=max(timeout, 0) / 1000))
+                while True:
+                    events.append(self.inbox.get_nowait())
+            except Empty:
+                pass
+
+    def loop_usage(self, state, cpu, wall):
+        """
+        Adds the CPU and wall time since :cpu: and :wall: to :state:, after each frame is shown
+        Returns tuple of the current cpu and wall times
+        """
+
+        if "interactive" not in self.startup:
+            self.startup["interactive"] = (perf_counter() - self.created) * 1000
+        self.loop_loaded()
+
+        now_cpu = process_time()
+        now_wall = perf_counter()
+        usage = self.cpu.setdefault(state, [0, 0])
+        usage[0] += now_cpu - cpu
+        usage[1] += now_wall - wall
+        return (now_cpu, now_wall)
+
+    def replay(self):
+        """
+        Plays back the loaded recording one simulation step per frame, as fast as it can draw
+        Each input goes through loop_events and is judged on its own, so they keep the order they were made in
+        """
+
+        self.clock = time.Clock()
+        self.loop = True
+
+        while self.loop and not self.player.done(self.steps):
+            for line in self.player.due(self.steps):
+                self.player.post(self, line)
+                self.loop_events()
+                self.loop_presses(float("inf"))
+                if not self.loop:
+                    break
+
+            # Anything else queued, such as the window closing
+            self.loop_events()
+            if self.profiler:
+                self.profiler.mark(Profiler.EVENTS)
+
+            # Draw each step exactly where the simulation is
+            self.update(Constants.GAMESTEP)
+            self.steps += 1
+            if self.profiler:
+                self.profiler.mark(Profiler.UPDATE)
+            self.loop_display(self.snapshot(), alpha=1)
+            self.clock.tick()
+            if self.profiler:
+                self.profiler.mark(Profiler.WAIT)
+            self.renderer.present()
+            self.player.frame(self.screen)
+            self.light_matrix.flush()
+            self.loop_loaded()
+            if self.profiler:
+                self.profiler.mark(Profiler.FLIP)
+                self.profiler.end_frame()
 
     def run(self):
-        mixer.music.play(0)
-        self.start()
+        if self.player:
+            self.replay()
+        else:
+            self.start()
+        if self.recorder:
+            self.recorder.save(self.record, self.steps, self.score.hits, self.score.misses)
+        if self.profiler and Constants.PROFILEFILE:
+            self.profiler.dump(Constants.PROFILEFILE)
+        if self.telemetry:
+            self.telemetry.close()
+        if self.capture:
+            self.capture.close()
         quit()
\ No newline at end of file
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+import random
+
+
+class HoleGrid:
+    """
+    Tracks which holes are taken by moles
+    Holes are ids 0 upwards, in the order of :positions:, and claiming, releasing or
+    picking a random free hole is O(1) however big the board is
+    """
+
+    def __init__(self, positions: list, rng: random.Random = None):
+        # Position of each hole, by id
+        self.positions = positions
+
+        # Random source for picking holes, shared random if not given
+        self.rng = rng if rng is not None else random
+
+        # Free hole ids, in no order, and where each hole is in that list (-1 if taken)
+        self.free = list(range(len(positions)))
+        self.index = list(range(len(positions)))
+
+        # What has taken each hole, by id
+        self.owners = [None] * len(positions)
+
+    @property
+    def free_count(self):
+        return len(self.free)
+
+    def is_free(self, hole):
+        return self.index[hole] != -1
+
+    def owner(self, hole):
+        """
+        Gets what has taken :hole:, any id outside the board has nothing
+        Returns owner, or None if free
+        """
+
+        if 0 <= hole < len(self.owners):
+            return self.owners[hole]
+        return None
+
+    def claim(self, hole, owner=None):
+        """
+        Takes a free hole for :owner:, swapping the last free hole into its place
+        """
+
+        index = self.index[hole]
+        last = self.free.pop()
+        if last != hole:
+            self.free[index] = last
+            self.index[last] = index
+        self.index[hole] = -1
+        self.owners[hole] = owner
+
+    def release(self, hole):
+        """
+        Frees a taken hole
+        """
+
+        self.index[hole] = len(self.free)
+        self.free.append(hole)
+        self.owners[hole] = None
+
+    def random_free(self, exclude=None):
+        """
+        Picks a free hole at random, other than :exclude:, without re-rolling
+        Returns hole id, or None if there is no choice
+        """
+
+        count = len(self.free)
+        if exclude is not None and self.index[exclude] != -1:
+            # Roll over one fewer and step past the excluded hole
+            if count < 2:
+                return None
+            pick = self.rng.randrange(count - 1)
+            if pick >= self.index[exclude]:
+                pick += 1
+        else:
+            if count < 1:
+                return None
+            pick = self.rng.randrange(count)
+
+        return self.free[pick]
+
+
+class HoleIndex:
+    """
+    Finds the hole under a point on the screen, for pointer and touch input
+    The screen is split into a uniform grid of cells the size of a hole's area, each listing the holes over it,
+    so a lookup checks the few holes in one cell however big the board is
+    Takes :positions: of the holes, :area: (x, y, width, height) each hole covers from its position,
+    and the :size: of the screen
+    """
+
+    def __init__(self, positions: list, area: tuple, size: tuple):
+        left, top, width, height = area
+
+        # Area each hole covers, (left, top, right, bottom), by id
+        self.rects = [(x + left, y + top, x + left + width, y + top + height) for x, y in positions]
+
+        # Cells across and down the screen, holes wholly off screen are never found
+        self.cell_width = max(width, 1)
+        self.cell_height = max(height, 1)
+        self.columns = int(size[0] // self.cell_width) + 1
+        self.rows = int(size[1] // self.cell_height) + 1
+
+        # Holes over each cell, row by row, a hole covers at most 2x2 cells
+        self.cells = [[] for _ in range(self.columns * self.rows)]
+        for hole, (x1, y1, x2, y2) in enumerate(self.rects):
+            for row in range(max(int(y1 // self.cell_height), 0), min(int(y2 // self.cell_height), self.rows - 1) + 1):
+                for column in range(max(int(x1 // self.cell_width), 0),
+                                    min(int(x2 // self.cell_width), self.columns - 1) + 1):
+                    self.cells[row * self.columns + column].append(hole)
+
+        # Holes further down the board are in front, so are found first where areas overlap
+        for cell in self.cells:
+            cell.reverse()
+
+    def hole_at(self, x, y):
+        """
+        Gets the hole covering the point :x:, :y:
+        Returns hole id, or -1 if there isn't one
+        """
+
+        column = int(x // self.cell_width)
+        row = int(y // self.cell_height)
+        if not (0 <= column < self.columns and 0 <= row < self.rows):
+            return -1
+
+        for hole in self.cells[row * self.columns + column]:
+            x1, y1, x2, y2 = self.rects[hole]
+            if x1 <= x < x2 and y1 <= y < y2:
+                return hole
+        return -1
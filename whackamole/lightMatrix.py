@@ -1,16 +1,119 @@
-from gpiozero import LED
+import warnings
+from abc import ABC, abstractmethod
+from os import environ
+
 from .constants import Constants
 
-class LightMatrix :
-    """Handels the pysical light matrix"""
+# Where the Pi names its board, missing on desktops
+BOARDMODEL = "/proc/device-tree/model"
+
+
+def board_backend(name: str = None):
+    """Gets the backend named by :name: (default BOARDBACKEND) to drive the board with
+    auto is gpio where gpiozero can drive pins, else none, it is only imported on a Pi or with
+    GPIOZERO_PIN_FACTORY set, so desktops don't pay for it
+    Returns str of gpio, mock or none"""
+    name = name or Constants.BOARDBACKEND
+    if name != "auto":
+        return name
+
+    if not environ.get("GPIOZERO_PIN_FACTORY"):
+        try:
+            with open(BOARDMODEL, "rb") as f:
+                if b"Raspberry Pi" not in f.read():
+                    return "none"
+        except OSError:
+            return "none"
+
+    try:
+        from gpiozero import Device
+        from gpiozero.exc import BadPinFactory
+
+        # Quiet the fallbacks tried on the way, none of them working is expected off the Pi
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            Device.ensure_pin_factory()
+    except (ImportError, BadPinFactory):
+        return "none"
+    return "gpio"
+
+
+class LightBackend(ABC):
+    """Drives the lights, the light matrix only asks it to change lights that need to change"""
+    def __init__(self, pins: list = Constants.PINS):
+        self.pins = pins
+
+    @abstractmethod
+    def write(self, pos: int, on: bool):
+        pass
+
+
+class NullBackend(LightBackend):
+    """No lights, such as on a desktop or in headless simulations"""
+    def write(self, pos: int, on: bool):
+        pass
+
+
+class MockBackend(LightBackend):
+    """Records the lights instead of driving them, for tests"""
     def __init__(self, pins: list = Constants.PINS):
+        super().__init__(pins)
+        self.state = [False] * len(pins)
+        self.changes = []  # (pos, on) in the order written
+
+    def write(self, pos: int, on: bool):
+        self.state[pos] = on
+        self.changes.append((pos, on))
+
+
+class GPIOBackend(LightBackend):
+    """Drives an LED on the Pi's GPIO for each pin"""
+    def __init__(self, pins: list = Constants.PINS):
+        from gpiozero import LED  # Only needed on the Pi
+
+        super().__init__(pins)
         self.leds = []
         for pin in pins:
             self.leds.append(LED(pin))
 
+    def write(self, pos: int, on: bool):
+        if on:
+            self.leds[pos].on()
+        else:
+            self.leds[pos].off()
+
+
+# Backends by name, for BOARDBACKEND
+BACKENDS = {"gpio": GPIOBackend, "mock": MockBackend, "none": NullBackend}
+
+
+class LightMatrix :
+    """Handels the pysical light matrix
+    Lights are set as wanted, then flush writes only the ones that changed to the backend"""
+    def __init__(self, pins: list = Constants.PINS, backend: LightBackend = None):
+        if backend is None:
+            backend = BACKENDS[board_backend()](pins)
+        self.backend = backend
+
+        # Lights as wanted, and as last written (all start off)
+        self.wanted = [False] * len(pins)
+        self.written = [False] * len(pins)
+
     def lightOn(self, pos: int):
-        self.leds[pos].on()
+        # Holes past the last light, and no hole (-1), have no light
+        if 0 <= pos < len(self.wanted):
+            self.wanted[pos] = True
 
     def lightOff(self, pos: int):
-        self.leds[pos].off()
+        if 0 <= pos < len(self.wanted):
+            self.wanted[pos] = False
+
+    def allOff(self):
+        for pos in range(len(self.wanted)):
+            self.wanted[pos] = False
 
+    def flush(self):
+        for pos, on in enumerate(self.wanted):
+            if on != self.written[pos]:
+                self.backend.write(pos, on)
+                self.written[pos] = on
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+from threading import Thread, Event
+
+from pygame import mixer
+
+from .constants import Constants
+from .assets import Assets
+from .sound import SoundBank
+
+
+class Loader:
+    """
+    Loads the game's images and sounds on a worker thread, so the window can show straight away
+    Images are decoded and scaled first, then converted on the main thread as the game takes them
+    Sounds come after, the game can start without them
+    Takes :images:, a list of (file, size) to decode
+    """
+
+    def __init__(self, images: list):
+        self.images = images
+
+        # Assets done, out of the images and the sounds
+        self.loaded = 0
+        self.total = len(images) + 1
+
+        # Set once the images are decoded, and once everything is loaded or failed
+        self.images_ready = Event()
+        self.sounds_ready = Event()
+
+        # Sound effects when loaded, and any error to raise on the main thread
+        self.sounds = None
+        self.error = None
+
+        self.thread = Thread(target=self.load, name="loader", daemon=True)
+        self.thread.start()
+
+    @property
+    def progress(self):
+        return self.loaded / self.total
+
+    def load(self):
+        try:
+            assets = Assets()
+            for file, size in self.images:
+                assets.decode(file, size)
+                self.loaded += 1
+            self.images_ready.set()
+
+            mixer.init()
+            mixer.music.load(Constants.SOUNDBACKGROUND)
+            self.sounds = SoundBank()
+            self.loaded += 1
+        except Exception as e:
+            self.error = e
+        finally:
+            self.images_ready.set()
+            self.sounds_ready.set()
+
+    def check(self):
+        """
+        Raises any error the worker hit, on the thread that called
+        """
+
+        if self.error is not None:
+            raise self.error
@@ -6,9 +6,11 @@ Whack a Mole
 A simple Whack a Mole game written with PyGame
 """
 
-from random import randint, choice
-from pygame import image, transform, time, mixer
+import random
+from math import log
 from .lightMatrix import LightMatrix
+from .assets import Assets
+from .telemetry import Telemetry
 from .constants import ImageConstants, MoleConstants, LevelConstants, HoleConstants
 
 
@@ -17,50 +19,98 @@ class Mole:
     Provides the mole used in game
     """
 
-    def __init__(self, light_matrix: LightMatrix):
-        # Load images
-        self.img_normal = image.load(ImageConstants.IMAGEMOLENORMAL)
-        self.img_normal = transform.scale(self.img_normal, (MoleConstants.MOLEWIDTH, MoleConstants.MOLEHEIGHT))
-        self.img_hit = image.load(ImageConstants.IMAGEMOLEHIT)
-        self.img_hit = transform.scale(self.img_hit, (MoleConstants.MOLEWIDTH, MoleConstants.MOLEHEIGHT))
+    # Deadlines a waiting mole is woken at by the Scheduler
+    SPAWN, HOLD, STUN, COOLDOWN = range(4)
 
+    # Rules for each level, worked out once, level -> (log chance of not popping up per step, min up, max up)
+    levels = {}
+
+    # Pixels the mole is lowered into the hole for each frame of the pop up animation
+    offsets = [MoleConstants.MOLEHEIGHT * (MoleConstants.MOLEDEPTH / MoleConstants.MOLEFRAMES *
+                                           (MoleConstants.MOLEFRAMES - f)) / 100
+               for f in range(MoleConstants.MOLEFRAMES + 1)]
+
+    # Images for each animation frame, normal and hit, loaded when first drawn so headless moles never load them
+    images = None
+
+    def __init__(self, light_matrix: LightMatrix, telemetry: Telemetry = None, rng: random.Random = None):
         # State of showing animation
         # 0 = No, 1 = Doing Up, -1 = Doing Down
         self.showing_state = 0
 
         # Hold timestamp for staying up
-        self.showing_counter = 0
+        self.showing_counter = None
 
         # Hold how long mole will stay up
         self.show_time = 0
 
-        # Our current hole data
+        # Our current hole data, position and last_hole are HoleGrid ids
         self.current_hole = (0, 0)
-        self.last_hole = (0, 0)
+        self.last_hole = None
         self.position = -1
 
         # Current frame of showing animation
         self.show_frame = 0
 
         # Total number of frames to show for popping up (not timed)
-        self.frames = 5
+        self.frames = MoleConstants.MOLEFRAMES
+
+        # Frame of the animation last positioned, index into offsets
+        self.frame_index = self.frames
+
+        # Pixels lowered into the hole, this and the previous simulation step
+        self.offset = self.offsets[self.frame_index]
+        self.last_offset = self.offset
+
+        # If the mole was showing after the last simulation step
+        self.visible = False
 
         # Cooldown from last popup
-        self.cooldown = 0
+        self.cooldown = None
 
         # Indicates if mole is hit
         # False = Not hit, timestamp for stunned freeze
         self.hit = False
 
+        # Frozen from a hit, until the stun deadline
+        self.stunned = False
+
+        # Deadline the Scheduler will wake the mole at, None if stepping every step
+        self.pending = None
+
+        # Simulation time, ms, advanced by update
+        self.ticks = 0
+
         # save lightMatrix
         self.light_matrix = light_matrix
 
+        # save telemetry, None if not recording
+        self.telemetry = telemetry
+
+        # Random source for popping up, shared random if not given
+        self.rng = rng if rng is not None else random
+
     @property
     def image(self):
-        if self.hit != False: return self.img_hit
-        return self.img_normal
+        return self.frame_image(self.hit is not False, self.frame_index)
+
+    @classmethod
+    def frame_image(cls, hit, frame):
+        """
+        Gets the image of :frame: of the pop up animation, hit or not, clipped at the hole and shared by all moles
+        Returns PyGame surface
+        """
+
+        if cls.images is None:
+            assets = Assets()
+            size = (MoleConstants.MOLEWIDTH, MoleConstants.MOLEHEIGHT)
+            cls.images = (assets.frames(ImageConstants.IMAGEMOLENORMAL, size, cls.offsets),
+                          assets.frames(ImageConstants.IMAGEMOLEHIT, size, cls.offsets))
 
-    def chance(self, level):
+        return cls.images[hit][frame]
+
+    @staticmethod
+    def chance(level):
         level -= 1  # Start at 0
 
         levelChance = 1 + ((LevelConstants.LEVELMOLECHANCE / 100) * level)
@@ -68,7 +118,8 @@ class Mole:
         chance = int((MoleConstants.MOLECHANCE ** -1) * levelChance)
         return chance
 
-    def timeLimits(self, level):
+    @staticmethod
+    def timeLimits(level):
         level -= 1  # Start at 0
 
         levelTime = 1 - ((LevelConstants.LEVELMOLESPEED / 100) * level)
@@ -79,112 +130,151 @@ class Mole:
 
         return (timeMin, timeMax)
 
-    def do_display(self, holes, level, do_tick=True):
-        # If in cooldown
-        if self.cooldown != 0:
-            if time.get_ticks() - self.cooldown < MoleConstants.MOLECOOLDOWN:
-                return [False]
-            else:
-                self.cooldown = 0
-                return [False, 1, self.last_hole]
-
-        # If doing a tick
-        if do_tick:
-
-            # Random choice if not showing
-            new_hole = False
-            if self.showing_state == 0 and holes:
-                # Reset
-                self.show_frame = 0
-                self.hit = False
-
-                # Pick
-                random = randint(0, self.chance(level))
-                if random == 0:
-                    self.showing_state = 1
-                    self.showing_counter = 0
-
-                    self.show_time = randint(*self.timeLimits(level))
-
-                    # Pick a new hole, don't pick the last one, don't infinite loop
-                    self.current_hole = self.last_hole
-                    if len(holes) > 1 or self.current_hole != holes[0]:
-                        self.light_matrix.lightOff(self.position)
-                        while self.current_hole == self.last_hole:  # as long as the holes are the same pick a new one
-                            self.position = randint(0, len(holes)-1)  # define a new position in the class
-                            self.current_hole = holes[self.position]  # use the same position to keep the hole
-                        self.last_hole = self.current_hole
-                        self.light_matrix.lightOn(self.position)
-                        new_hole = True
-
-            # Show as popped up for a bit
-            if self.showing_state == 1 and self.showing_counter != 0:
-                if time.get_ticks() - self.showing_counter >= self.show_time:
-                    self.showing_state = -1
-                    self.showing_counter = 0
-
-            # Return if game should display, including new hole data
-            if new_hole:
-                return [True, 0, self.current_hole]
-
-        # Return if game should display
-        return [(not self.showing_state == 0)]
+    @staticmethod
+    def level_rules(level):
+        # Popping up each step is a roll of 0 in randint(0, chance), so 1 in chance + 1
+        return (log(1 - 1 / (Mole.chance(level) + 1)),) + Mole.timeLimits(level)
+
+    @classmethod
+    def rules(cls, level):
+        """
+        Gets the rules for :level: from the level table, added to it if past the end
+        Returns tuple of log of the chance of not popping up each step, and shortest and longest time up in ms
+        """
+
+        if level not in cls.levels:
+            cls.levels[level] = cls.level_rules(level)
+        return cls.levels[level]
+
+    def spawn_delay(self, level, dt):
+        """
+        Draws how long until the mole pops up, rolling for it each :dt: ms step
+        The steps until the first success is geometric, so one draw replaces a roll every step
+        Returns float of ms, half a step before the step it pops up on
+        """
+
+        steps = int(log(1 - self.rng.random()) / self.rules(level)[0])
+        return (steps + 0.5) * dt
+
+    def spawn(self, ticks, holes, level):
+        """
+        Pops the mole up in a free hole at :ticks:
+        Returns hole id
+        """
+
+        self.ticks = ticks
+
+        # Reset
+        self.show_frame = 0
+        self.hit = False
+        self.stunned = False
+        self.showing_state = 1
+        self.showing_counter = None
 
-    def get_base_pos(self):
-        holeX, holeY = self.current_hole
-        offset = (HoleConstants.HOLEWIDTH - MoleConstants.MOLEWIDTH) / 2
+        self.show_time = self.rng.randint(*self.rules(level)[1:])
 
-        moleX = holeX + offset
-        moleY = (holeY + HoleConstants.HOLEHEIGHT) - (MoleConstants.MOLEHEIGHT * 1.2)
-        return (moleX, moleY)
+        # Pick a new hole, don't pick the last one unless it's the only one free
+        hole = holes.random_free(exclude=self.last_hole)
+        if hole is None:
+            hole = self.last_hole
+        self.position = hole
+        self.current_hole = holes.positions[hole]
+        self.last_hole = hole
+        self.light_matrix.lightOn(self.position)
 
-    def get_hole_pos(self, do_tick=True):
-        moleX, moleY = self.get_base_pos()
+        if self.telemetry:
+            self.telemetry.record(Telemetry.SPAWN, self.ticks, self.position, self.show_time)
 
-        frame = 0
+        return hole
 
-        # Stunned
-        if self.hit != False:
-            if time.get_ticks() - self.hit >= MoleConstants.MOLESTUNNED:
-                # Unfrozen after hit, hide
-                if self.showing_state != 0:
-                    self.showing_state = -1
-            else:
-                # Frozen from hit
-                do_tick = False
+    def fall(self):
+        """
+        Starts going down, once held up long enough or no longer stunned
+        """
+
+        self.stunned = False
+        if self.showing_state != 0:
+            self.showing_state = -1
+            self.showing_counter = None
+
+    def settle(self, ticks):
+        """
+        Holds the mole where it is at :ticks:, so it is no longer drawn between steps
+        """
+
+        self.ticks = ticks
+        self.last_offset = self.offset
+        self.visible = self.showing_state != 0
+
+    def animate(self, ticks):
+        """
+        Moves the mole one step up or down at :ticks:
+        Returns None while still moving, else tuple of the deadline to wake at (None if already set) and ticks
+        """
+
+        self.settle(ticks)
+
+        # Frozen from hit, woken by the stun deadline
+        if self.stunned:
+            return (None, None)
 
         # Going Up
         if self.showing_state == 1:
-            if self.show_frame <= self.frames:
-                frame = MoleConstants.MOLEDEPTH / self.frames * (self.frames - self.show_frame)
-                if do_tick: self.show_frame += 1
-            else:
-                # Hold
-                if self.showing_counter == 0:
-                    self.showing_counter = time.get_ticks()
+            frame = self.show_frame
+            self.show_frame += 1
+            self.frame_index = frame
+            self.offset = self.offsets[frame]
+
+            # Fully up, hold
+            if self.show_frame > self.frames:
+                self.showing_counter = ticks
+                return (self.HOLD, ticks + self.show_time)
+            return None
 
         # Going Down
-        if self.showing_state == -1:
-            if do_tick: self.show_frame -= 1
-            if self.show_frame >= 0:
-                frame = MoleConstants.MOLEDEPTH / self.frames * (self.frames - self.show_frame)
-            else:
-                # Reset
-                self.showing_state = 0
-                frame = MoleConstants.MOLEDEPTH
-                # Begin cooldown
-                if do_tick: self.cooldown = time.get_ticks()
+        self.show_frame -= 1
+        if self.show_frame >= 0:
+            self.frame_index = min(self.show_frame, self.frames)
+            self.offset = self.offsets[self.frame_index]
+            return None
+
+        # Reset, begin cooldown
+        self.showing_state = 0
+        self.frame_index = 0
+        self.offset = self.offsets[0]
+        self.cooldown = ticks
+        return (self.COOLDOWN, ticks + MoleConstants.MOLECOOLDOWN)
+
+    def get_base_pos(self):
+        holeX, holeY = self.current_hole
+        offset = (HoleConstants.HOLEWIDTH - MoleConstants.MOLEWIDTH) / 2
+
+        moleX = holeX + offset
+        moleY = (holeY + HoleConstants.HOLEHEIGHT) - (MoleConstants.MOLEHEIGHT * 1.2)
+        return (moleX, moleY)
+
+    def get_hole_pos(self, alpha=1):
+        """
+        Gets where to draw the mole, :alpha: of the way from the previous simulation step to the current one
+        Returns tuple of position
+        """
+
+        moleX, moleY = self.get_base_pos()
 
-        moleY += (MoleConstants.MOLEHEIGHT * (frame / 100))
+        moleY += self.last_offset + (self.offset - self.last_offset) * alpha
 
         return (moleX, moleY)
 
-    def is_hit(self, pos):
+    def is_hit(self, pos, ticks=None):
         if pos == self.position:   # if mole gut hit
             if self.hit is False:  # if mole didn't gut hit yet
-                self.hit = time.get_ticks()  # keep the time when the mole gut hit
+                self.hit = self.ticks if ticks is None else ticks  # keep the time when the mole gut hit
                 return 1
             else:
                 return 2
 
         return False
+
+
+# The level table, later levels are added as they are reached
+Mole.levels.update((f, Mole.level_rules(f)) for f in range(1, LevelConstants.LEVELTABLE + 1))
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+from array import array
+from json import dump
+from time import perf_counter
+
+from .constants import Constants
+
+
+class Profiler:
+    """
+    Times each phase of every frame, keeping the last :window: frames of each phase to take percentiles from
+    Each mark charges the time since the previous mark to a phase, so the phases add up to the whole frame
+    The game only holds a profiler when profiling, every hook is skipped otherwise
+    """
+
+    # Phases of a frame, in the order they happen
+    # flip includes pushing the light matrix, wait is the time clock.tick sleeps to hold the frame rate
+    PHASES = ("events", "update", "moles", "hud", "board", "sprites", "flip", "wait")
+    EVENTS, UPDATE, MOLES, HUD, BOARD, SPRITES, FLIP, WAIT = range(len(PHASES))
+
+    # Percentiles reported
+    POINTS = (50, 95, 99)
+
+    def __init__(self, window: int = Constants.PROFILEWINDOW):
+        self.window = window
+
+        # Ring of ms per frame for each phase, and the frame being timed, s
+        self.samples = [array("d", bytes(8 * window)) for _ in self.PHASES]
+        self.current = [0.0] * len(self.PHASES)
+        self.frames = 0
+
+        self.last = perf_counter()
+
+        # Percentiles last worked out, phase -> list of ms, kept between refreshes so the overlay is stable
+        self.stats = {}
+
+    def mark(self, phase):
+        now = perf_counter()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        """
+        Stores the frame just timed, refreshing the percentiles every PROFILEREFRESH frames
+        """
+
+        index = self.frames % self.window
+        for phase, time in enumerate(self.current):
+            self.samples[phase][index] = time * 1000
+            self.current[phase] = 0.0
+        self.frames += 1
+
+        if self.frames % Constants.PROFILEREFRESH == 0:
+            self.refresh()
+
+    def refresh(self):
+        count = min(self.frames, self.window)
+        totals = [0.0] * count
+        self.stats = {}
+
+        for name, samples in zip(self.PHASES, self.samples):
+            values = samples[:count]
+            for i, value in enumerate(values):
+                totals[i] += value
+            self.stats[name] = self.percentiles(values)
+        self.stats["frame"] = self.percentiles(totals)
+
+    def percentiles(self, values):
+        values = sorted(values)
+        if not values:
+            return [0] * len(self.POINTS)
+        return [values[min(int(len(values) * f / 100), len(values) - 1)] for f in self.POINTS]
+
+    def overlay(self):
+        """
+        Gets the percentiles as readout text, changes only when refreshed
+        Returns str
+        """
+
+        text = ["PROFILE ms p{}/p{}/p{}".format(*self.POINTS)]
+        for name, values in self.stats.items():
+            text.append("{}: {:.1f} {:.1f} {:.1f}".format(name.upper(), *values))
+        return " / ".join(text)
+
+    def dump(self, file):
+        """
+        Writes the percentiles and the raw samples, oldest first, to :file: as JSON
+        """
+
+        self.refresh()
+        count = min(self.frames, self.window)
+        start = self.frames % self.window if self.frames > self.window else 0
+        samples = {}
+        for name, values in zip(self.PHASES, self.samples):
+            samples[name] = (values[start:count] + values[:start]).tolist()
+
+        with open(file, "w") as f:
+            dump({"frames": self.frames, "points": self.POINTS, "percentiles": self.stats, "samples": samples}, f)
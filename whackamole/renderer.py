@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+from pygame import display, Rect, Surface, SRCALPHA
+
+from .constants import Constants
+from .profiler import Profiler
+
+
+class Renderer:
+    """
+    Draws each frame to the screen
+    In dirty mode only the regions that changed since the last frame are redrawn and pushed to the display
+    Static layers are flattened into one board surface, and full screen fills are cached,
+    so a steady frame allocates no surfaces
+    """
+
+    def __init__(self, screen, dirty: bool = Constants.DIRTYRECTS):
+        self.screen = screen
+        self.dirty = dirty
+
+        # Static layers drawn under everything, (surface, position), and what they were flattened from
+        self.board = []
+        self.board_key = None
+        self.layers = []
+
+        # Cached full screen fills, (size, color) -> surface
+        self.fills = {}
+
+        # What was drawn last frame, slot -> (surface, rect)
+        self.last = {}
+
+        # Regions to push to the display, None for the whole screen
+        self.rects = None
+
+        # Fraction of the screen redrawn in the last frame
+        self.dirty_area = 1
+
+        # Force a full redraw on the next frame
+        self.full = True
+
+        # Times the blits, None if not profiling
+        self.profiler = None
+
+        # Records each frame shown, None if not capturing
+        self.capture = None
+
+    def invalidate(self):
+        self.full = True
+
+    def compose(self, layers):
+        """
+        Flattens the static :layers:, a list of (surface, position), into the board
+        Only rebuilt when the layers or screen size change, such as the grid constants changing
+        """
+
+        size = self.screen.get_size()
+        key = (size, tuple((id(surface), tuple(position)) for surface, position in layers))
+        if key == self.board_key:
+            return
+
+        board = Surface(size).convert()
+        for surface, position in layers:
+            board.blit(surface, position)
+
+        # Keep the layers, so their ids aren't reused by other surfaces while the key holds them
+        self.layers = layers
+        self.board_key = key
+        self.board = [(board, (0, 0))]
+        self.invalidate()
+
+    def fill(self, color):
+        """
+        Gets a surface the size of the screen filled with :color:, which may be translucent
+        Returns PyGame surface, which must not be drawn on
+        """
+
+        size = self.screen.get_size()
+        key = (size, tuple(color))
+        if key not in self.fills:
+            surface = Surface(size, SRCALPHA, 32).convert_alpha()
+            surface.fill(color)
+            self.fills[key] = surface
+        return self.fills[key]
+
+    def draw_layers(self, sprites, clip=None):
+        self.screen.set_clip(clip)
+
+        for surface, position in self.board:
+            self.screen.blit(surface, position)
+        if self.profiler:
+            self.profiler.mark(Profiler.BOARD)
+
+        for _, surface, rect in sprites:
+            if clip is None or clip.colliderect(rect):
+                self.screen.blit(surface, rect)
+        if self.profiler:
+            self.profiler.mark(Profiler.SPRITES)
+
+        self.screen.set_clip(None)
+
+    def draw(self, sprites):
+        """
+        Draws the board then the :sprites:, a list of (slot, surface, position) in draw order
+        Slots identify a sprite between frames, a sprite is redrawn if its surface or position changes
+        """
+
+        sprites = [(slot, surface, Rect(position, surface.get_size())) for slot, surface, position in sprites]
+        current = {slot: (surface, rect) for slot, surface, rect in sprites}
+
+        # Draw everything
+        if not self.dirty or self.full:
+            self.draw_layers(sprites)
+            self.rects = None
+            self.dirty_area = 1
+            self.full = False
+
+        # Draw only what changed, clearing where sprites were
+        else:
+            self.rects = []
+            for slot in set(self.last) | set(current):
+                last = self.last.get(slot)
+                now = current.get(slot)
+                if last is not None and now is not None and last[0] is now[0] and last[1] == now[1]:
+                    continue
+                if last is not None:
+                    self.rects.append(last[1])
+                if now is not None:
+                    self.rects.append(now[1])
+
+            screen_rect = self.screen.get_rect()
+            self.rects = [f.clip(screen_rect) for f in self.rects]
+            self.rects = [f for f in self.rects if f.width and f.height]
+            for rect in self.rects:
+                self.draw_layers(sprites, rect)
+
+            area = sum(f.width * f.height for f in self.rects)
+            self.dirty_area = area / (screen_rect.width * screen_rect.height)
+
+        self.last = current
+        if self.profiler:
+            self.profiler.mark(Profiler.SPRITES)
+
+    def present(self):
+        if self.rects is None:
+            display.flip()
+        else:
+            display.update(self.rects)
+
+        # The whole frame, only the changed regions are pushed but the screen holds all of it
+        if self.capture:
+            self.capture.frame(self.screen)
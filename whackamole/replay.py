@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+from json import dumps, loads
+from warnings import warn
+from zlib import crc32
+
+from pygame import event, KEYDOWN
+
+from .constants import Constants
+
+
+class Recorder:
+    """
+    Records the inputs of a game against the simulation step they were judged on
+    Along with the seed, that is everything needed to play the game again exactly
+
+    Saved as JSONL, a header object with the seed and timer, one object per input
+    of step and either key (pygame key code) or button (hole), then an end object with the result
+    """
+
+    def __init__(self, seed, timer):
+        self.header = {"seed": seed, "timer": timer, "step": Constants.GAMESTEP}
+        self.inputs = []
+
+    def key(self, step, key):
+        self.inputs.append({"step": step, "key": key})
+
+    def button(self, step, pos):
+        self.inputs.append({"step": step, "button": pos})
+
+    def save(self, file, step, hits, misses):
+        with open(file, "w") as f:
+            f.write(dumps(self.header) + "\n")
+            for line in self.inputs:
+                f.write(dumps(line) + "\n")
+            f.write(dumps({"end": True, "step": step, "hits": hits, "misses": misses}) + "\n")
+
+
+class Player:
+    """
+    Plays back a recording made by Recorder, one simulation step at a time
+    Keys are posted as pygame events so they go through the same loop_events as a real game
+    Optionally hashes every frame drawn, so two replays can be checked as identical
+    """
+
+    def __init__(self, file, hash_frames: bool = False):
+        with open(file) as f:
+            lines = [loads(line) for line in f if line.strip()]
+
+        self.header = lines[0]
+        self.end = lines[-1] if lines[-1].get("end") else None
+        self.inputs = [f for f in lines[1:] if not f.get("end")]
+        self.next = 0
+
+        # Running CRC32 of the frames, None if not hashing
+        self.digest = 0 if hash_frames else None
+
+        if self.header["step"] != Constants.GAMESTEP:
+            warn("Recorded at step {}ms, replaying at {}ms, results will differ".format(
+                self.header["step"], Constants.GAMESTEP))
+
+    @property
+    def seed(self):
+        return self.header["seed"]
+
+    @property
+    def timer(self):
+        return self.header["timer"]
+
+    def done(self, step):
+        """
+        Whether the recording has finished by :step:, its end step if saved, else its last input
+        """
+
+        if self.end is not None:
+            return step >= self.end["step"]
+        return self.next >= len(self.inputs)
+
+    def due(self, step):
+        """
+        Takes the inputs recorded for :step:, in the order they were made
+        """
+
+        inputs = []
+        while self.next < len(self.inputs) and self.inputs[self.next]["step"] <= step:
+            inputs.append(self.inputs[self.next])
+            self.next += 1
+        return inputs
+
+    def post(self, game, line):
+        """
+        Feeds a recorded input to :game: the way it first arrived
+        """
+
+        if "key" in line:
+            event.post(event.Event(KEYDOWN, key=line["key"]))
+        else:
+            # Already debounced when recorded
+            game.buttons.queue.put((0, line["button"]))
+
+    def frame(self, surface):
+        if self.digest is not None:
+            self.digest = crc32(surface.get_buffer().raw, self.digest)
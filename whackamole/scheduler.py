@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+from heapq import heappush, heappop
+
+from .constants import MoleConstants
+from .holes import HoleGrid
+from .mole import Mole
+
+
+class Scheduler:
+    """
+    Steps the moles by deadline, so a step only touches moles with something to do
+    Waiting moles sit in a heap until their spawn, hold, stun or cooldown deadline
+    Only moles popping up or down are stepped every step, and once more when they stop so they settle
+    """
+
+    def __init__(self, moles: list, holes: HoleGrid):
+        self.moles = moles
+        self.holes = holes
+
+        # Deadlines, [ticks, order, kind, mole], order breaks ties so moles are never compared
+        # A mole's pending deadline is the only live one, any others for it are skipped when popped
+        self.heap = []
+        self.order = 0
+
+        # Moles stepped every step, and moles to settle next step
+        self.moving = []
+        self.settling = []
+
+        # Level the spawns were drawn for
+        self.level = None
+
+    def schedule(self, mole, kind, ticks):
+        entry = [ticks, self.order, kind, mole]
+        self.order += 1
+        mole.pending = entry
+        heappush(self.heap, entry)
+
+    def schedule_spawn(self, mole, ticks, dt, level):
+        # Rolls start with the step after :ticks:
+        self.schedule(mole, Mole.SPAWN, ticks + mole.spawn_delay(level, dt))
+
+    def update(self, ticks, dt, level, do_tick=True):
+        """
+        Advances the moles to :ticks:, one :dt: ms step on
+        Moles freeze when not :do_tick:, as at the end of a game
+        """
+
+        if not do_tick:
+            for mole in self.moving + self.settling:
+                mole.settle(ticks)
+            self.settling = []
+            return
+
+        # The chance of popping up changes with level, waiting never changes the odds so redraw from this step
+        if level != self.level:
+            self.level = level
+            for mole in self.moles:
+                waiting = mole.pending is None and mole.showing_state == 0 and mole.cooldown is None
+                if waiting or (mole.pending is not None and mole.pending[2] == Mole.SPAWN):
+                    self.schedule_spawn(mole, ticks - dt, dt, level)
+
+        # Wake moles whose deadline has passed
+        while self.heap and self.heap[0][0] <= ticks:
+            entry = heappop(self.heap)
+            _, _, kind, mole = entry
+            if mole.pending is not entry:
+                continue
+            mole.pending = None
+
+            if kind == Mole.SPAWN:
+                # Only rolled for with a hole free, roll again from the next step
+                if not self.holes.free_count:
+                    self.schedule_spawn(mole, ticks, dt, level)
+                    continue
+                self.holes.claim(mole.spawn(ticks, self.holes, level), mole)
+                self.moving.append(mole)
+
+            elif kind == Mole.HOLD or kind == Mole.STUN:
+                mole.fall()
+                self.moving.append(mole)
+
+            elif kind == Mole.COOLDOWN:
+                mole.cooldown = None
+                # The light goes off with the hole, before another mole can rise in it
+                if mole.last_hole is not None and not self.holes.is_free(mole.last_hole):
+                    self.holes.release(mole.last_hole)
+                    mole.light_matrix.lightOff(mole.last_hole)
+                self.schedule_spawn(mole, ticks, dt, level)
+
+        # Stop drawing moles that stopped last step between steps
+        for mole in self.settling:
+            mole.settle(ticks)
+        self.settling = []
+
+        # Step moles going up or down
+        moving = []
+        for mole in self.moving:
+            wake = mole.animate(ticks)
+            if wake is None:
+                moving.append(mole)
+                continue
+            kind, at = wake
+            if kind is not None:
+                self.schedule(mole, kind, at)
+            self.settling.append(mole)
+        self.moving = moving
+
+    def whack(self, pos, ticks):
+        """
+        Whacks the hole at :pos: at :ticks:, stunning the mole there if it is up
+        Returns 1 if hit, 2 if already hit, False if missed
+        """
+
+        # Holes stay owned through the cooldown, a mole that has sunk can't be hit
+        mole = self.holes.owner(pos)
+        if mole is None or mole.showing_state == 0:
+            return False
+
+        result = mole.is_hit(pos, ticks)
+        if result == 1:
+            mole.stunned = True
+            self.schedule(mole, Mole.STUN, ticks + MoleConstants.MOLESTUNNED)
+        return result
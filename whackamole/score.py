@@ -65,8 +65,16 @@ class Score:
         return text
 
     def label(self, *, timer=None, debug={}, size=1):
-        return self.text.get_label(self.disp_score(timer, debug), "/", scale=size,
-                                   width=GameConstants.GAMEWIDTH, background=(0, 0, 0, 0.4 * 255))
+        # Key on what is shown, score and level follow from hits and misses
+        # Timer is shown to the second, -1 is the start prompt
+        shown_timer = None
+        if timer:
+            shown_timer = timer if timer == -1 else max(round(timer), 0)
+        key = ("score", self.hits, self.misses, shown_timer, tuple(debug.items()), size)
+
+        return self.text.cached(key, lambda: self.text.build_label(self.disp_score(timer, debug), "/", scale=size,
+                                                                   width=GameConstants.GAMEWIDTH,
+                                                                   background=(0, 0, 0, 0.4 * 255)))
 
     def hit(self):
         self.hits += 1
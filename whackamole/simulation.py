@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+import random
+from collections import namedtuple
+from argparse import ArgumentParser
+from functools import partial
+from heapq import heappush, heappop
+from multiprocessing import Pool
+from time import perf_counter
+
+from .constants import Constants
+from .mole import Mole
+from .lightMatrix import LightMatrix, NullBackend
+from .score import Score
+from .text import Text
+from .holes import HoleGrid
+from .scheduler import Scheduler
+from .telemetry import Telemetry
+
+
+class MoleSnapshot(namedtuple("MoleSnapshot", "index hole hit frame base last_offset offset")):
+    """
+    A shown mole as it was after a simulation step
+    """
+
+    __slots__ = ()
+
+    def get_hole_pos(self, alpha=1):
+        moleX, moleY = self.base
+        return (moleX, moleY + self.last_offset + (self.offset - self.last_offset) * alpha)
+
+
+# Everything drawn, as it was after a simulation step
+# games counts resets, so a view can tell a new game from the same one
+Snapshot = namedtuple("Snapshot", "games ticks state gameTime endGame level hits misses last_hit last_miss "
+                                   "holes moles")
+
+
+class Simulation:
+    """
+    Handles the rules of the game, without display, sound or input
+    Time only moves when update is called, so whole games can run faster than real time
+    Takes :timer: in seconds for game timer, and a :seed: so games can be repeated exactly
+    """
+
+    def __init__(self, *, timer: int = None, light_matrix=None, telemetry: Telemetry = None, seed=None):
+        # Set lightMatrix, nothing to light if headless
+        self.light_matrix = light_matrix if light_matrix is not None else LightMatrix(backend=NullBackend())
+
+        # Set telemetry, None if not recording
+        self.telemetry = telemetry
+
+        # Set timer
+        self.timer = timer
+
+        # Random source for all the rules, seeded so games can be repeated
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+
+        # Get the text object, kept between resets so rendered labels stay cached
+        self.text = Text()
+
+        # Games started, counted by reset
+        self.games = 0
+
+        # Reset/initialise data
+        self.reset()
+
+    def reset(self):
+        # Lights of the last game's moles go out, the new moles start down
+        self.light_matrix.allOff()
+
+        # Load moles
+        self.moles = [Mole(self.light_matrix, self.telemetry, self.rng) for _ in range(Constants.MOLECOUNT)]  # create a List
+
+        # Generate hole positions
+        self.holes = []
+        base_row = Constants.GAMEHEIGHT / Constants.HOLEROWS
+        base_column = Constants.GAMEWIDTH / Constants.HOLECOLUMNS
+        for row in range(Constants.HOLEROWS):
+            rowY = base_row * row
+            rowY += (base_row - Constants.HOLEHEIGHT) / 2
+            for column in range(Constants.HOLECOLUMNS):
+                thisX = base_column * column
+                thisX += (base_column - Constants.HOLEWIDTH) / 2
+                self.holes.append((int(thisX), int(rowY)))
+
+        # Track which holes have moles
+        self.grid = HoleGrid(self.holes, self.rng)
+
+        # Wakes the moles when they have something to do
+        self.scheduler = Scheduler(self.moles, self.grid)
+
+        # Get the score object
+        self.score = Score(self.text)
+
+        # Allow for game timer
+        self.timer_start = None
+
+        # Simulation time, ms, advanced by update
+        self.ticks = 0
+
+        # When the last hit and miss were judged, ms
+        self.last_hit = None
+        self.last_miss = None
+
+        self.games += 1
+
+        if self.telemetry:
+            self.telemetry.record(Telemetry.RESET, self.ticks, self.timer or 0)
+
+    @property
+    def timerData(self):
+        if self.timer is not None and self.timer_start is not None:
+            remain = (self.ticks - self.timer_start) / 1000
+            remain = self.timer - remain
+            endGame = True if remain <= 0 else False
+            return (remain, endGame)
+        return (None, False)
+
+    @property
+    def state(self):
+        """
+        What the game is showing, title, playing or gameover
+        The title and game over screens are static, nothing moves until a key is pressed
+        """
+
+        gameTime, endGame = self.timerData
+        if self.timer and self.timer_start is None:
+            return "title"
+        if endGame:
+            return "gameover"
+        return "playing"
+
+    def snapshot(self):
+        """
+        Copies what is drawn out of the simulation, so it can be drawn while the simulation steps on
+        Returns Snapshot
+        """
+
+        gameTime, endGame = self.timerData
+        moles = tuple(MoleSnapshot(index, mole.position, mole.hit is not False, mole.frame_index,
+                                   mole.get_base_pos(), mole.last_offset, mole.offset)
+                      for index, mole in enumerate(self.moles) if mole.visible)
+        return Snapshot(self.games, self.ticks, self.state, gameTime, endGame, self.score.level, self.score.hits,
+                        self.score.misses, self.last_hit, self.last_miss, self.holes, moles)
+
+    def press(self, pos):
+        """
+        Whacks the hole at :pos:, the first press starts the timer instead
+        Returns tuple of if it was a hit and if it was a miss, both False if the mole was already stunned
+        """
+
+        # Start timer if not started
+        if self.timer is not None and self.timer_start is None:
+            self.timer_start = self.ticks
+            return (False, False)
+
+        # Handle hit/miss, only the mole in that hole can be hit
+        hit = False
+        miss = True
+        result = self.scheduler.whack(pos, self.ticks)
+        if result == 1:  # Hit
+            hit = True
+            miss = False
+        if result == 2:  # Hit but stunned
+            miss = False
+        level = self.score.level
+        if hit:
+            self.score.hit()
+            self.last_hit = self.ticks
+        if miss:
+            self.score.miss()
+            self.last_miss = self.ticks
+
+        if self.telemetry:
+            if hit or miss:
+                self.telemetry.record(Telemetry.HIT if hit else Telemetry.MISS, self.ticks, pos, self.score.score)
+            if self.score.level > level:
+                self.telemetry.record(Telemetry.LEVELUP, self.ticks, self.score.level, self.score.score)
+
+        return (hit, miss)
+
+    def update(self, dt):
+        """
+        Advances the game by :dt: ms, one fixed simulation step
+        """
+
+        self.ticks += dt
+        gameTime, endGame = self.timerData
+
+        # Update moles with something to do, they take and free holes as they go
+        self.scheduler.update(self.ticks, dt, self.score.level, not endGame)
+
+
+def play(seed, timer=60, reaction=400, spread=100, accuracy=0.9):
+    """
+    Plays a whole game headless with a simulated player, seeded by :seed:
+    The player whacks each mole :reaction: ms (normally distributed by :spread:) after it appears,
+    picking the right hole with a chance of :accuracy:
+    Returns dict of game results
+    """
+
+    # The player gets their own random, so doesn't change the moles
+    player = random.Random(seed)
+
+    simulation = Simulation(timer=timer, seed=seed)
+    simulation.press(-1)
+
+    holes = Constants.HOLEROWS * Constants.HOLECOLUMNS
+    presses = []  # (ticks, pos)
+    appeared = [None] * len(simulation.moles)
+    uptimes = []
+
+    while not simulation.timerData[1]:
+        simulation.update(Constants.GAMESTEP)
+
+        # Watch moles appear and disappear
+        for index, mole in enumerate(simulation.moles):
+            if mole.visible and appeared[index] is None:
+                appeared[index] = simulation.ticks
+                pos = mole.position
+                if player.random() >= accuracy:
+                    pos = player.choice([f for f in range(holes) if f != mole.position])
+                heappush(presses, (simulation.ticks + max(player.gauss(reaction, spread), 0), pos))
+            elif not mole.visible and appeared[index] is not None:
+                uptimes.append(simulation.ticks - appeared[index])
+                appeared[index] = None
+
+        # Whack when the player reacts
+        while presses and presses[0][0] <= simulation.ticks:
+            simulation.press(heappop(presses)[1])
+
+    return {
+        "hits": simulation.score.hits,
+        "misses": simulation.score.misses,
+        "score": simulation.score.score,
+        "level": simulation.score.level,
+        "uptimes": uptimes,
+    }
+
+
+def percentile(values, percent):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(int(len(values) * percent / 100), len(values) - 1)]
+
+
+def run(games, *, processes=None, seed=0, **kwargs):
+    """
+    Plays :games: seeded games across a pool of :processes: (default one per CPU)
+    Other keyword arguments are passed to play
+    Returns dict of aggregate statistics
+    """
+
+    with Pool(processes) as pool:
+        results = pool.map(partial(play, **kwargs), range(seed, seed + games), chunksize=max(games // 64, 1))
+
+    hits = sum(f["hits"] for f in results)
+    attempts = hits + sum(f["misses"] for f in results)
+    levels = [f["level"] for f in results]
+    uptimes = [u for f in results for u in f["uptimes"]]
+
+    return {
+        "games": games,
+        "hit_rate": hits / attempts if attempts else 0,
+        "score_mean": sum(f["score"] for f in results) / games,
+        "level_mean": sum(levels) / games,
+        "level_max": max(levels),
+        "levels": {f: levels.count(f) for f in sorted(set(levels))},
+        "uptime_mean": sum(uptimes) / len(uptimes) if uptimes else 0,
+        "uptime_p10": percentile(uptimes, 10),
+        "uptime_p50": percentile(uptimes, 50),
+        "uptime_p90": percentile(uptimes, 90),
+    }
+
+
+def main():
+    parser = ArgumentParser(description="Play many headless games and report aggregate statistics")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timer", type=int, default=60)
+    parser.add_argument("--reaction", type=float, default=400, help="mean player reaction time, ms")
+    parser.add_argument("--spread", type=float, default=100, help="standard deviation of reaction time, ms")
+    parser.add_argument("--accuracy", type=float, default=0.9, help="chance of whacking the right hole")
+    args = parser.parse_args()
+
+    start = perf_counter()
+    stats = run(args.games, processes=args.processes, seed=args.seed, timer=args.timer,
+                reaction=args.reaction, spread=args.spread, accuracy=args.accuracy)
+    elapsed = perf_counter() - start
+
+    for key, val in stats.items():
+        print("{}: {}".format(key, val))
+    print("{:,} games in {:,.2f}s ({:,.2f}ms per game)".format(args.games, elapsed, elapsed / args.games * 1000))
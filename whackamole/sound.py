@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+from collections import deque
+from random import choice
+from time import perf_counter
+from pygame import mixer
+
+from .constants import SoundConstants
+
+
+class SoundBank:
+    """
+    Holds every sound effect decoded in memory, played through a pool of reserved channels
+    The mixer must be initialised first
+    """
+
+    def __init__(self, channels: int = SoundConstants.SOUNDCHANNELS):
+        # Decode all the effects once
+        self.sounds = {
+            "hit": [mixer.Sound(f) for f in SoundConstants.SOUNDHIT],
+            "miss": [mixer.Sound(f) for f in SoundConstants.SOUNDMISS],
+            "levelUp": [mixer.Sound(SoundConstants.SOUNDLEVELUP)],
+        }
+
+        # Reserve channels so music and other sounds can't take them
+        if mixer.get_num_channels() < channels:
+            mixer.set_num_channels(channels)
+        mixer.set_reserved(channels)
+        self.channels = [mixer.Channel(f) for f in range(channels)]
+
+        # When each channel was last started
+        self.started = [0] * channels
+
+        # Recent input to play latencies, ms
+        self.latencies = deque(maxlen=SoundConstants.SOUNDLATENCYSAMPLES)
+
+    def channel(self):
+        """
+        Picks a free channel, or steals the one that has been playing the longest
+        Returns index of channel
+        """
+
+        for index, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                return index
+
+        return self.started.index(min(self.started))
+
+    def play(self, name, pressed=None):
+        """
+        Plays a random sample of the effect :name:
+        :pressed: is the perf_counter time of the input that caused it, to measure latency
+        """
+
+        index = self.channel()
+        self.channels[index].play(choice(self.sounds[name]))
+        self.started[index] = perf_counter()
+
+        if pressed is not None:
+            self.latencies.append((self.started[index] - pressed) * 1000)
+
+    @property
+    def latency(self):
+        """
+        Average input to play latency in ms, over recent plays
+        """
+
+        if not self.latencies:
+            return 0
+        return sum(self.latencies) / len(self.latencies)
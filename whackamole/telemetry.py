@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+from array import array
+from json import dumps
+from struct import Struct
+from threading import Thread, Event
+from time import perf_counter
+
+from .constants import Constants
+
+
+class Overhead:
+    """
+    Tracks the time a recorder takes from the game loop, added to overhead in s as it works
+    """
+
+    overhead = 0
+
+    def take_overhead(self):
+        """
+        Gets the time taken since last taken
+        Returns float of ms
+        """
+
+        overhead, self.overhead = self.overhead, 0
+        return overhead * 1000
+
+
+class Telemetry(Overhead):
+    """
+    Records what happens in games to a file, without the game loop ever waiting on the disk
+    Events go into a preallocated ring buffer, which a background thread drains to the file in batches
+    If the buffer fills faster than it drains, new events are dropped and counted
+
+    JSONL files have one object per event, binary files one record per event of
+    kind (unsigned byte, index into EVENTS) then ticks and two values (little endian doubles)
+    """
+
+    # Kinds of event, and what their two values are
+    EVENTS = ("reset", "spawn", "hit", "miss", "levelUp", "frame")
+    FIELDS = {
+        "reset": ("timer", None),
+        "spawn": ("hole", "show_time"),
+        "hit": ("hole", "score"),
+        "miss": ("hole", "score"),
+        "levelUp": ("level", "score"),
+        "frame": ("frame_ms", "steps"),
+    }
+    RESET, SPAWN, HIT, MISS, LEVELUP, FRAME = range(len(EVENTS))
+
+    RECORD = Struct("<Bddd")
+
+    def __init__(self, file: str, *, binary: bool = False, size: int = Constants.TELEMETRYBUFFER):
+        self.size = size
+        self.binary = binary
+
+        # Ring buffer, written at head by the game and read at tail by the writer
+        self.kinds = array("B", bytes(size))
+        self.ticks = array("d", bytes(8 * size))
+        self.values_a = array("d", bytes(8 * size))
+        self.values_b = array("d", bytes(8 * size))
+        self.head = 0
+        self.tail = 0
+
+        # Events lost to a full buffer
+        self.dropped = 0
+
+        # Background writer
+        self.file = open(file, "wb" if binary else "w")
+        self.stopping = Event()
+        self.thread = Thread(target=self.drain_loop, name="telemetry", daemon=True)
+        self.thread.start()
+
+    def record(self, kind, ticks, value_a=0, value_b=0):
+        """
+        Adds an event to the buffer, never blocks
+        """
+
+        start = perf_counter()
+
+        # Only the game moves head and only the writer moves tail, so no lock is needed
+        if self.head - self.tail >= self.size:
+            self.dropped += 1
+        else:
+            index = self.head % self.size
+            self.kinds[index] = kind
+            self.ticks[index] = ticks
+            self.values_a[index] = value_a
+            self.values_b[index] = value_b
+            self.head += 1
+
+        self.overhead += perf_counter() - start
+
+    def drain(self):
+        """
+        Writes every buffered event to the file
+        """
+
+        head = self.head
+        lines = []
+        for position in range(self.tail, head):
+            index = position % self.size
+            kind = self.kinds[index]
+            if self.binary:
+                lines.append(self.RECORD.pack(kind, self.ticks[index], self.values_a[index], self.values_b[index]))
+            else:
+                name = self.EVENTS[kind]
+                data = {"event": name, "ticks": self.ticks[index]}
+                for field, value in zip(self.FIELDS[name], (self.values_a[index], self.values_b[index])):
+                    if field:
+                        data[field] = value
+                lines.append(dumps(data) + "\n")
+        self.tail = head
+
+        if lines:
+            self.file.write((b"" if self.binary else "").join(lines))
+            self.file.flush()
+
+    def drain_loop(self):
+        while not self.stopping.wait(Constants.TELEMETRYINTERVAL):
+            self.drain()
+
+    def close(self):
+        """
+        Stops the writer, writing anything still buffered
+        """
+
+        self.stopping.set()
+        self.thread.join()
+        self.drain()
+        self.file.close()
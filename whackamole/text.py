@@ -7,7 +7,8 @@ A simple Whack a Mole game written with PyGame
 :copyright: (c) 2018 Matt Cowley (IPv4)
 """
 
-from pygame import font, Surface, SRCALPHA
+from collections import OrderedDict
+from pygame import font, Surface, SRCALPHA, BLEND_RGBA_MAX
 
 from .constants import TextConstants
 
@@ -15,16 +16,93 @@ from .constants import TextConstants
 class Text:
     """
     Handles all the text used
+    Fonts and glyph atlases are cached on the class, so are shared by every instance
     """
 
+    # Loaded fonts, keyed by font size
+    fonts = {}
+
+    # Pre-rendered glyphs, keyed by (font size, color)
+    atlases = {}
+
+    def __init__(self):
+        # Finished labels, most recently used last
+        self.labels = OrderedDict()
+
+    def cached(self, key, build):
+        """
+        Gets the label stored for :key:, calling :build: to generate it if not stored
+        The least recently used label is dropped once TEXTCACHESIZE is reached
+        Returns PyGame surface, which must not be drawn on
+        """
+
+        label = self.labels.get(key)
+        if label is not None:
+            self.labels.move_to_end(key)
+            return label
+
+        label = build()
+        self.labels[key] = label
+        if len(self.labels) > TextConstants.TEXTCACHESIZE:
+            self.labels.popitem(last=False)
+
+        return label
+
     def font(self, size):
-        # f = font.SysFont("monospace", int(size))
-        f = font.Font(TextConstants.TEXTFONTFILE, int(size))
-        # Generate test char
-        test = f.render("a", 1, (0, 0, 0))
-        # Calc line sizes
-        line_width = test.get_width()
-        return (f, line_width)
+        size = int(size)
+
+        # Only load the font file once per size
+        if size not in self.fonts:
+            # f = font.SysFont("monospace", int(size))
+            f = font.Font(TextConstants.TEXTFONTFILE, size)
+            # Generate test char
+            test = f.render("a", 1, (0, 0, 0))
+            # Calc line sizes
+            line_width = test.get_width()
+            self.fonts[size] = (f, line_width)
+
+        return self.fonts[size]
+
+    def atlas(self, size, color):
+        """
+        Gets the glyph atlas for a font size and color, rendering the common characters up front
+        Returns dict of character to PyGame surface
+        """
+
+        key = (int(size), tuple(color))
+        if key not in self.atlases:
+            f, _ = self.font(size)
+            glyphs = {}
+            for char in TextConstants.TEXTGLYPHS:
+                glyphs[char] = f.render(char, 1, color).convert_alpha()
+            self.atlases[key] = glyphs
+
+        return self.atlases[key]
+
+    def render(self, line, size, color):
+        """
+        Composes a line of text from the cached glyphs, the font must be monospace
+        Returns PyGame surface
+        """
+
+        f, line_width = self.font(size)
+        glyphs = self.atlas(size, color)
+
+        surface = Surface((line_width * len(line), f.get_height()), SRCALPHA, 32)
+        surface = surface.convert_alpha()
+
+        x = 0
+        for char in line:
+            glyph = glyphs.get(char)
+            # Render anything not in the atlas once, then keep it
+            if glyph is None:
+                glyph = f.render(char, 1, color).convert_alpha()
+                glyphs[char] = glyph
+            # Glyphs don't overlap, so take the max to avoid blending them onto the transparent line
+            surface.blit(glyph, (x, 0), special_flags=BLEND_RGBA_MAX)
+            x += line_width
+
+        return surface
 
     def wrap(self, unsafe, length, break_char):
         """
@@ -59,7 +137,7 @@ class Text:
 
         # Font Size
         font_size = TextConstants.TEXTFONTSIZE * scale
-        font, line_width = self.font(font_size)
+        _, line_width = self.font(font_size)
 
         # Get wrapped text
         if width:
@@ -70,7 +148,7 @@ class Text:
         # Render font
         labels = []
         for line in lines:
-            render = font.render(line, 1, color)
+            render = self.render(line, font_size, color)
             labels.append(render)
 
         return labels
@@ -78,6 +156,17 @@ class Text:
     def get_label(self, string, break_char="", *, width=None, height=None, scale=1, color=(255, 255, 0),
                   background=None):
         """
+        Gets text in a given area, wrapped at :break_char:, from the label cache
+        Returns PyGame surface, which must not be drawn on
+        """
+
+        key = (string, break_char, width, height, scale, tuple(color), background and tuple(background))
+        return self.cached(key, lambda: self.build_label(string, break_char, width=width, height=height,
+                                                         scale=scale, color=color, background=background))
+
+    def build_label(self, string, break_char="", *, width=None, height=None, scale=1, color=(255, 255, 0),
+                    background=None):
+        """
         Generates text in a given area, wrapped at :break_char:
         Returns PyGame surface
         """
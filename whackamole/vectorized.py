@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+"""
+Whack a Mole
+~~~~~~~~~~~~~~~~~~~
+A simple Whack a Mole game written with PyGame
+:copyright: (c) 2018 Matt Cowley (IPv4)
+"""
+
+import numpy as np
+
+from .constants import MoleConstants
+from .mole import Mole
+
+
+class MoleArray:
+    """
+    Provides many moles at once, for big boards and stress tests
+    Follows the same rules as Mole, but all state is kept in NumPy arrays and every mole is advanced
+    in one batched step per update
+    Takes :moles: moles over :holes: holes, and a :seed: for the random rolls
+    """
+
+    def __init__(self, moles: int, holes: int, seed=None):
+        self.count = moles
+        self.rng = np.random.default_rng(seed)
+
+        # Reference mole for the level rules
+        self.rules = Mole(None)
+        self.frames = MoleConstants.MOLEFRAMES
+        self.offsets = np.array(Mole.offsets)
+
+        # State of showing animation
+        # 0 = No, 1 = Doing Up, -1 = Doing Down
+        self.showing_state = np.zeros(moles, np.int8)
+
+        # Hold timestamp for staying up, and how long to stay up
+        self.showing_counter = np.zeros(moles)
+        self.showing_counter_set = np.zeros(moles, bool)
+        self.show_time = np.zeros(moles)
+
+        # Hole ids, -1 for none
+        self.position = np.full(moles, -1)
+        self.last_hole = np.full(moles, -1)
+
+        # Current frame of showing animation
+        self.show_frame = np.zeros(moles, np.int32)
+        self.frame_index = np.full(moles, self.frames, np.int32)
+
+        # Pixels lowered into the hole, this and the previous simulation step
+        self.offset = np.full(moles, self.offsets[self.frames])
+        self.last_offset = self.offset.copy()
+
+        # If each mole was showing after the last simulation step
+        self.visible = np.zeros(moles, bool)
+
+        # Cooldown from last popup
+        self.cooldown = np.zeros(moles)
+        self.cooldown_set = np.zeros(moles, bool)
+
+        # Timestamp each mole was hit, for stunned freeze
+        self.hit = np.zeros(moles)
+        self.hit_set = np.zeros(moles, bool)
+
+        # Mole in each hole, -1 if free
+        self.owners = np.full(holes, -1)
+
+        # Simulation time, ms, advanced by update
+        self.ticks = 0
+
+    def update(self, dt, level, do_tick=True):
+        """
+        Advances every mole by :dt: ms, one fixed simulation step
+        """
+
+        self.ticks += dt
+        ticks = self.ticks
+        state = self.showing_state
+        np.copyto(self.last_offset, self.offset)
+
+        # Cooldowns, moles release their hole when it ends
+        cooling = self.cooldown_set.copy()
+        done = cooling & (ticks - self.cooldown >= MoleConstants.MOLECOOLDOWN)
+        if done.any():
+            released = np.flatnonzero(done)
+            holes = self.last_hole[released]
+            owned = (holes >= 0) & (self.owners[np.maximum(holes, 0)] == released)
+            self.owners[holes[owned]] = -1
+            self.cooldown_set[released] = False
+        active = ~cooling
+
+        if do_tick:
+            # Random choice if not showing
+            free = np.flatnonzero(self.owners < 0)
+            idle = np.flatnonzero(active & (state == 0))
+            if len(free) and len(idle):
+                # Reset
+                self.show_frame[idle] = 0
+                self.hit_set[idle] = False
+
+                # Pick
+                rolls = self.rng.integers(0, self.rules.chance(level), len(idle), endpoint=True)
+                self.spawn(idle[rolls == 0], free, level)
+
+            # Show as popped up for a bit
+            expired = active & (state == 1) & self.showing_counter_set & \
+                (ticks - self.showing_counter >= self.show_time)
+            state[expired] = -1
+            self.showing_counter_set[expired] = False
+
+        visible = active & (state != 0)
+        self.visible = visible
+        self.animate(visible, do_tick)
+
+    def spawn(self, moles, free, level):
+        """
+        Pops up :moles: in distinct free holes, each avoiding its last hole unless there is no other choice
+        """
+
+        moles = moles[:len(free)]
+        count = len(moles)
+        if not count:
+            return
+
+        self.showing_state[moles] = 1
+        self.showing_counter_set[moles] = False
+        self.show_time[moles] = self.rng.integers(*self.rules.timeLimits(level), count, endpoint=True)
+
+        # Pick new holes, swapping in spare free holes for any mole given its last one
+        candidates = self.rng.permutation(free)
+        holes = candidates[:count]
+        spare = candidates[count:]
+        conflicts = np.flatnonzero(holes == self.last_hole[moles])[:len(spare)]
+        holes[conflicts] = spare[:len(conflicts)]
+
+        self.owners[holes] = moles
+        self.position[moles] = holes
+        self.last_hole[moles] = holes
+
+    def animate(self, visible, do_tick=True):
+        state = self.showing_state
+        ticks = self.ticks
+
+        # Fully up
+        frame = np.full(self.count, self.frames, np.int32)
+        tick = np.full(self.count, do_tick)
+
+        # Stunned
+        stunned = visible & self.hit_set
+        unfrozen = stunned & (ticks - self.hit >= MoleConstants.MOLESTUNNED)
+        state[unfrozen & (state != 0)] = -1  # Unfrozen after hit, hide
+        tick[stunned & ~unfrozen] = False  # Frozen from hit
+
+        # Going Up
+        up = visible & (state == 1)
+        rising = up & (self.show_frame <= self.frames)
+        frame[rising] = self.show_frame[rising]
+        self.show_frame[rising & tick] += 1
+        holding = up & ~rising & ~self.showing_counter_set
+        self.showing_counter[holding] = ticks
+        self.showing_counter_set[holding] = True
+
+        # Going Down
+        down = visible & (state == -1)
+        self.show_frame[down & tick] -= 1
+        sinking = down & (self.show_frame >= 0)
+        frame[sinking] = np.minimum(self.show_frame[sinking], self.frames)
+        ended = down & ~sinking
+        state[ended] = 0  # Reset
+        frame[ended] = 0
+        self.cooldown[ended & tick] = ticks  # Begin cooldown
+        self.cooldown_set[ended & tick] = True
+
+        self.frame_index[visible] = frame[visible]
+        self.offset[visible] = self.offsets[frame[visible]]
+
+    def is_hit(self, pos):
+        """
+        Whacks the hole at :pos:
+        Returns 1 for a hit, 2 if the mole there was already stunned, False if the hole is empty or its mole has sunk
+        """
+
+        if not 0 <= pos < len(self.owners) or self.owners[pos] < 0:
+            return False
+
+        # Holes stay owned through the cooldown, a mole that has sunk can't be hit
+        mole = self.owners[pos]
+        if self.showing_state[mole] == 0:
+            return False
+        if not self.hit_set[mole]:
+            self.hit[mole] = self.ticks
+            self.hit_set[mole] = True
+            return 1
+        return 2